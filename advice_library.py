@@ -0,0 +1,73 @@
+"""
+Fallback Advice Library for Telegram Voice-to-Insight Bot
+
+Static archetype advice used by /advice when the full archetype system is
+unavailable. All fields are packed into one UTF-8 buffer with an offset table
+and decoded lazily, at most once per field.
+"""
+
+from array import array
+from functools import lru_cache
+from typing import Dict
+
+ADVICE_FIELDS = ("title", "text", "style")
+
+_RAW_ADVICE = [
+    (
+        "💡 Совет мудреца",
+        "Найдите время подумать над ключевыми моментами из сообщения. Что самое важное? Какие долгосрочные последствия? Иногда лучшее решение приходит после паузы и размышления.",
+        "Глубокий анализ"
+    ),
+    (
+        "🎭 Творческий подход",
+        "Попробуйте взглянуть на ситуацию с неожиданной стороны. Какие альтернативы вы видите? Что, если подойти к вопросу совершенно по-другому? Креативность часто рождает лучшие решения.",
+        "Нестандартное мышление"
+    ),
+    (
+        "❤️ Эмпатический взгляд",
+        "Учтите эмоциональную составляющую ситуации. Что чувствуют все участники? Как ваши действия могут повлиять на отношения? Понимание эмоций часто ключ к решению.",
+        "Эмоциональный интеллект"
+    ),
+    (
+        "🃏 Игровая перспектива",
+        "Иногда лучший совет - не принимать всё слишком серьезно. Можно ли найти здесь что-то позитивное или забавное? Легкость и юмор помогают справиться с трудностями.",
+        "Позитивный настрой"
+    ),
+]
+
+ADVICE_COUNT = len(_RAW_ADVICE)
+
+
+def _pack(entries) -> tuple:
+    """Pack advice fields into one NUL-separated buffer plus start offsets"""
+    encoded = [field.encode('utf-8') for entry in entries for field in entry]
+    offsets = array('I', [0])
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk) + 1)
+    return b"\x00".join(encoded) + b"\x00", offsets
+
+
+_ADVICE_BLOB, _ADVICE_OFFSETS = _pack(_RAW_ADVICE)
+del _RAW_ADVICE
+
+
+@lru_cache(maxsize=None)
+def _get_field(slot: int) -> str:
+    return _ADVICE_BLOB[_ADVICE_OFFSETS[slot]:_ADVICE_OFFSETS[slot + 1] - 1].decode('utf-8')
+
+
+def get_advice(index: int) -> Dict[str, str]:
+    """
+    Get advice entry by index.
+
+    Args:
+        index: Advice index in range [0, ADVICE_COUNT)
+
+    Returns:
+        Dict with title, text and style
+    """
+    if not 0 <= index < ADVICE_COUNT:
+        raise IndexError(f"Advice index out of range: {index}")
+
+    base = index * len(ADVICE_FIELDS)
+    return {field: _get_field(base + i) for i, field in enumerate(ADVICE_FIELDS)}
@@ -9,20 +9,20 @@ import asyncio
 import json
 import logging
 import os
-from datetime import datetime
+import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from emotion_analyzer import EmotionScores
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ArchetypeResponse:
     """Response generated by a specific archetype"""
     archetype: str
@@ -150,7 +150,7 @@ class ArchetypeResponseGenerator:
     Implements the unified response template with personality-specific variations.
     """
     
-    def __init__(self, openai_client: OpenAI):
+    def __init__(self, openai_client: AsyncOpenAI):
         self.client = openai_client
         self.config_loader = ArchetypeConfigLoader()
         self.timeout = 10  # Archetype responses can take longer than emotion analysis
@@ -174,7 +174,7 @@ class ArchetypeResponseGenerator:
         Returns:
             ArchetypeResponse with generated advice
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # Get archetype configuration
@@ -200,7 +200,7 @@ class ArchetypeResponseGenerator:
             # Parse response into structured format
             responses, signature = self._parse_archetype_response(response_text, archetype)
             
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             logger.info(f"{archetype} response generated in {processing_time:.3f}s")
             
@@ -212,7 +212,7 @@ class ArchetypeResponseGenerator:
             )
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             error_msg = f"{archetype} response generation failed: {str(e)}"
             logger.error(f"{error_msg} (after {processing_time:.3f}s)")
             
@@ -228,7 +228,7 @@ class ArchetypeResponseGenerator:
         """Make GPT-4o API call for archetype response generation"""
         try:
             response = await asyncio.wait_for(
-                self._sync_api_call(prompt, config),
+                self._api_call(prompt, config),
                 timeout=self.timeout
             )
             return response
@@ -242,28 +242,23 @@ class ArchetypeResponseGenerator:
         except Exception as e:
             raise Exception(f"Unexpected error during API call: {str(e)}")
     
-    async def _sync_api_call(self, prompt: str, config: Dict[str, Any]) -> str:
-        """Synchronous OpenAI API call wrapped for async usage"""
-        def make_call():
-            response = self.client.chat.completions.create(
-                model=config.get('model', 'gpt-4o'),
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"Ты архетип {config['name']} - {config['description']}"
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=config.get('max_tokens', 800),
-                temperature=config.get('temperature', 0.7),
-                timeout=config.get('timeout', 10)
-            )
-            content = response.choices[0].message.content
-            return content.strip() if content else ""
-        
-        # Run in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, make_call)
+    async def _api_call(self, prompt: str, config: Dict[str, Any]) -> str:
+        """Native async OpenAI API call"""
+        response = await self.client.chat.completions.create(
+            model=config.get('model', 'gpt-4o'),
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"Ты архетип {config['name']} - {config['description']}"
+                },
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=config.get('max_tokens', 800),
+            temperature=config.get('temperature', 0.7),
+            timeout=config.get('timeout', 10)
+        )
+        content = response.choices[0].message.content
+        return content.strip() if content else ""
     
     def _get_emotion_levels(self, emotion_scores: EmotionScores) -> Dict[str, str]:
         """Convert emotion scores to Russian level descriptions"""
@@ -298,13 +293,12 @@ class ArchetypeResponseGenerator:
         *[Signature phrase]*
         """
         try:
-            lines = response_text.strip().split('\n')
+            lines = [s for s in map(str.strip, response_text.splitlines()) if s]
             responses = []
             signature = ""
             
             # Extract numbered responses
             for line in lines:
-                line = line.strip()
                 if line.startswith(('1.', '2.', '3.')):
                     # Remove numbering and clean up
                     response = line[2:].strip()
@@ -347,7 +341,7 @@ class ArchetypeSystem:
     Provides high-level interface for the complete archetype workflow.
     """
     
-    def __init__(self, openai_client: OpenAI):
+    def __init__(self, openai_client: AsyncOpenAI):
         self.selector = ArchetypeSelector()
         self.generator = ArchetypeResponseGenerator(openai_client)
     
@@ -391,6 +385,6 @@ class ArchetypeSystem:
 
 
 # Factory function for easy integration
-def create_archetype_system(openai_client: OpenAI) -> ArchetypeSystem:
+def create_archetype_system(openai_client: AsyncOpenAI) -> ArchetypeSystem:
     """Create configured ArchetypeSystem instance"""
     return ArchetypeSystem(openai_client) 
\ No newline at end of file
@@ -267,7 +267,7 @@ class HybridAudioProcessor:
         Main processing entry point implementing hybrid algorithm
         """
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # 1. Quick file analysis (50-100ms)
@@ -290,7 +290,7 @@ class HybridAudioProcessor:
             # 4. Cache result
             await self.cache_manager.set(file_id, audio_data, ttl=3600)
             
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             logger.info(f"Audio processing completed for {file_id} in {processing_time:.2f}s")
             
             return audio_data
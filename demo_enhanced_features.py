@@ -46,11 +46,11 @@ class EnhancedFeaturesDemo:
         print("✅ Text processor initialized")
         
         # Initialize emotion analyzer
-        self.emotion_analyzer = EmotionAnalyzer(self.text_processor.client)
+        self.emotion_analyzer = EmotionAnalyzer(self.text_processor.client, self.text_processor.request_limiter)
         print("✅ Emotion analyzer initialized")
         
         # Initialize archetype system
-        self.archetype_system = create_archetype_system(self.text_processor.client)
+        self.archetype_system = create_archetype_system(self.text_processor.client.with_options(max_retries=2))
         print("✅ Archetype system initialized")
         
         print("🚀 All systems ready!\n")
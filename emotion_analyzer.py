@@ -6,19 +6,25 @@ with configurable thresholds and integration with existing text processing pipel
 """
 
 import asyncio
-import json
 import logging
-from datetime import datetime
-from typing import Dict, Optional, Any
-from dataclasses import dataclass
+import re
+import time
+from typing import Dict, Optional, Any, Tuple
+from dataclasses import dataclass, replace
 
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+import fast_json
+from request_limiter import RequestLimiter
+from response_cache import ResponseCache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
+EMOTION_FIELDS = ('sarcasm', 'toxicity', 'manipulation')
+
 
-@dataclass
+@dataclass(slots=True)
 class EmotionScores:
     """Emotion analysis scores for a text"""
     sarcasm: float = 0.0
@@ -36,12 +42,17 @@ class EmotionAnalyzer:
     and integration with existing text processing patterns.
     """
     
-    def __init__(self, openai_client: OpenAI):
+    def __init__(self, openai_client: AsyncOpenAI, request_limiter: Optional[RequestLimiter] = None):
         self.client = openai_client
+        self.request_limiter = request_limiter or RequestLimiter()
         self.model = "gpt-4o"
         self.max_tokens = 200
         self.temperature = 0.1  # Low temperature for consistent scoring
         self.timeout = 5  # Target ≤0.3s overhead, allow buffer for network
+        # Emotion scores sit on the user's reply path: one retry at most, and a
+        # hard deadline covering slot wait, both attempts and the backoff between them
+        self.max_attempts = 2
+        self.total_timeout = self.max_attempts * self.timeout + 2.0
         
         # Emotion detection thresholds (from creative specifications)
         self.thresholds = {
@@ -52,6 +63,11 @@ class EmotionAnalyzer:
         
         # Emotion analysis prompt (optimized for Russian content)
         self.emotion_prompt = self._build_emotion_prompt()
+        # Resolve the template once; per request only the text is concatenated
+        self._prompt_prefix, _, self._prompt_suffix = self.emotion_prompt.format(text="\0").partition("\0")
+        
+        # Exact-match cache of successful analyses
+        self._cache = ResponseCache(maxsize=1024)
     
     def _build_emotion_prompt(self) -> str:
         """Build optimized GPT-4o prompt for emotion detection"""
@@ -86,11 +102,18 @@ class EmotionAnalyzer:
         if not text or not text.strip():
             return EmotionScores(error_message="Empty text provided")
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
+        
+        cache_key = make_cache_key(self.model, self.emotion_prompt, text.strip())
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            processing_time = time.perf_counter() - start_time
+            logger.info(f"Emotion analysis served from cache in {processing_time:.3f}s")
+            return replace(cached, processing_time=processing_time)
         
         try:
             # Prepare prompt with text
-            prompt = self.emotion_prompt.format(text=text.strip())
+            prompt = self._prompt_prefix + text.strip() + self._prompt_suffix
             
             # Make GPT-4o API call
             response = await self._make_api_call(prompt)
@@ -99,9 +122,14 @@ class EmotionAnalyzer:
             emotion_scores = self._parse_emotion_response(response)
             
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             emotion_scores.processing_time = processing_time
             
+            # Only cache real scores, not neutral fallbacks from parse errors;
+            # cache a copy so callers editing the returned scores can't change it
+            if not emotion_scores.error_message:
+                self._cache.put(cache_key, replace(emotion_scores))
+            
             logger.info(f"Emotion analysis completed in {processing_time:.3f}s - "
                        f"sarcasm: {emotion_scores.sarcasm:.2f}, "
                        f"toxicity: {emotion_scores.toxicity:.2f}, "
@@ -110,7 +138,7 @@ class EmotionAnalyzer:
             return emotion_scores
             
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             error_msg = f"Emotion analysis failed: {str(e)}"
             logger.error(f"{error_msg} (after {processing_time:.3f}s)")
             
@@ -122,15 +150,13 @@ class EmotionAnalyzer:
     async def _make_api_call(self, prompt: str) -> str:
         """Make async GPT-4o API call with timeout and error handling"""
         try:
-            # Use asyncio timeout for performance control
-            response = await asyncio.wait_for(
-                self._sync_api_call(prompt),
-                timeout=self.timeout
-            )
-            return response
+            # self.timeout bounds each attempt inside the limiter; total_timeout
+            # caps the whole call including slot wait and retry backoff
+            return await asyncio.wait_for(self._api_call(prompt), timeout=self.total_timeout)
             
-        except asyncio.TimeoutError:
-            raise Exception(f"Emotion analysis timeout after {self.timeout}s")
+        except (asyncio.TimeoutError, openai.APITimeoutError):
+            raise Exception(f"Emotion analysis timeout ({self.max_attempts} attempts of {self.timeout}s, "
+                            f"{self.total_timeout:g}s total)")
         except openai.RateLimitError:
             raise Exception("OpenAI rate limit exceeded")
         except openai.APIError as e:
@@ -138,34 +164,32 @@ class EmotionAnalyzer:
         except Exception as e:
             raise Exception(f"Unexpected error during API call: {str(e)}")
     
-    async def _sync_api_call(self, prompt: str) -> str:
-        """Synchronous OpenAI API call wrapped for async usage"""
-        def make_call():
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Ты эксперт по анализу эмоционального подтекста в русских текстах."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                timeout=self.timeout
-            )
-            content = response.choices[0].message.content
-            
-            # Handle None or empty response
-            if not content:
-                logger.warning("GPT-4o returned empty content")
-                return "{\"sarcasm\": 0.0, \"toxicity\": 0.0, \"manipulation\": 0.0}"
-            
-            return content.strip()
+    async def _api_call(self, prompt: str) -> str:
+        """Native async OpenAI API call"""
+        response = await self.request_limiter.call(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Ты эксперт по анализу эмоционального подтекста в русских текстах."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            timeout=self.timeout,
+            attempt_timeout=self.timeout,
+            max_attempts=self.max_attempts
+        )
+        content = response.choices[0].message.content
         
-        # Run in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, make_call)
+        # Handle None or empty response
+        if not content:
+            logger.warning("GPT-4o returned empty content")
+            return "{\"sarcasm\": 0.0, \"toxicity\": 0.0, \"manipulation\": 0.0}"
+        
+        return content.strip()
     
     def _parse_emotion_response(self, response: str) -> EmotionScores:
         """Parse GPT-4o response into EmotionScores with robust error handling"""
@@ -183,35 +207,36 @@ class EmotionAnalyzer:
             # Clean response and extract JSON
             response = response.strip()
             
-            # Remove markdown formatting - more robust approach
-            lines = response.split('\n')
-            json_lines = []
-            inside_json = False
+            # Fast path: bare JSON or one ```json fenced block (C-level prefix/suffix strip)
+            json_text = response.removeprefix('```json').removeprefix('```').removesuffix('```').strip()
             
-            for line in lines:
-                line = line.strip()
+            if not (json_text.startswith('{') and json_text.endswith('}')):
+                # Remove markdown formatting - more robust approach
+                lines = [s for s in map(str.strip, response.splitlines()) if s]
+                json_lines = []
+                inside_json = False
                 
-                # Start of JSON block
-                if line.startswith('```json') or line == '```':
-                    inside_json = True
-                    continue
-                # End of JSON block
-                elif line == '```' and inside_json:
-                    break
-                # JSON content
-                elif inside_json or line.startswith('{'):
-                    json_lines.append(line)
-                    inside_json = True
-                # Direct JSON without markdown
-                elif '"sarcasm"' in line or '"toxicity"' in line or '"manipulation"' in line:
-                    json_lines.append(line)
-            
-            # Join JSON lines
-            json_text = '\n'.join(json_lines).strip()
+                for line in lines:
+                    # Start of JSON block
+                    if line.startswith('```json') or line == '```':
+                        inside_json = True
+                        continue
+                    # End of JSON block
+                    elif line == '```' and inside_json:
+                        break
+                    # JSON content
+                    elif inside_json or line.startswith('{'):
+                        json_lines.append(line)
+                        inside_json = True
+                    # Direct JSON without markdown
+                    elif '"sarcasm"' in line or '"toxicity"' in line or '"manipulation"' in line:
+                        json_lines.append(line)
+                
+                # Join JSON lines
+                json_text = '\n'.join(json_lines).strip()
             
             # Fallback: try to find JSON-like pattern
             if not json_text:
-                import re
                 json_pattern = r'\{[^}]*"sarcasm"[^}]*\}'
                 match = re.search(json_pattern, response, re.DOTALL)
                 if match:
@@ -226,7 +251,7 @@ class EmotionAnalyzer:
                     )
             
             # Parse JSON response
-            emotion_data = json.loads(json_text)
+            emotion_data = fast_json.loads(json_text)
             
             # Extract and validate scores with defaults
             sarcasm = float(emotion_data.get('sarcasm', 0.0))
@@ -244,7 +269,7 @@ class EmotionAnalyzer:
                 manipulation=manipulation
             )
             
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
+        except (fast_json.JSONDecodeError, ValueError, KeyError) as e:
             logger.warning(f"Failed to parse emotion response. Response: '{response[:200]}...'. Error: {e}")
             # Return neutral scores on parse failure
             return EmotionScores(
@@ -272,28 +297,7 @@ class EmotionAnalyzer:
         Returns:
             Dict with emotion names and their level descriptions
         """
-        if scores.error_message:
-            # Show first 30 chars of error for debugging
-            error_short = scores.error_message[:30] + "..." if len(scores.error_message) > 30 else scores.error_message
-            return {
-                'sarcasm': f'ошибка: {error_short}',
-                'toxicity': f'ошибка: {error_short}', 
-                'manipulation': f'ошибка: {error_short}'
-            }
-        
-        def score_to_level(score: float, high_threshold: float) -> str:
-            if score >= high_threshold:
-                return 'высокий'
-            elif score >= high_threshold * 0.6:  # Medium threshold at 60% of high
-                return 'средний'
-            else:
-                return 'низкий'
-        
-        return {
-            'sarcasm': score_to_level(scores.sarcasm, self.thresholds['sarcasm_high']),
-            'toxicity': score_to_level(scores.toxicity, self.thresholds['toxicity_high']),
-            'manipulation': score_to_level(scores.manipulation, self.thresholds['manipulation_high'])
-        }
+        return self.summarize(scores)[1]
     
     def has_high_emotion(self, scores: EmotionScores) -> Dict[str, bool]:
         """
@@ -305,14 +309,41 @@ class EmotionAnalyzer:
         Returns:
             Dict indicating which emotions are at high levels
         """
+        return self.summarize(scores)[2]
+    
+    def summarize(self, scores: EmotionScores) -> Tuple[Dict[str, float], Dict[str, str], Dict[str, bool]]:
+        """
+        Build scores, levels and high-flags dicts in a single pass over the emotions.
+        
+        The one place the level thresholds are applied; get_emotion_levels()
+        and has_high_emotion() return slices of this.
+        
+        Args:
+            scores: EmotionScores object
+            
+        Returns:
+            Tuple of (scores dict, levels dict, high-flags dict)
+        """
+        values = {name: getattr(scores, name) for name in EMOTION_FIELDS}
+        
         if scores.error_message:
-            return {'sarcasm': False, 'toxicity': False, 'manipulation': False}
+            # Show first 30 chars of error for debugging
+            error_short = scores.error_message[:30] + "..." if len(scores.error_message) > 30 else scores.error_message
+            return values, dict.fromkeys(EMOTION_FIELDS, f'ошибка: {error_short}'), dict.fromkeys(EMOTION_FIELDS, False)
         
-        return {
-            'sarcasm': scores.sarcasm >= self.thresholds['sarcasm_high'],
-            'toxicity': scores.toxicity >= self.thresholds['toxicity_high'], 
-            'manipulation': scores.manipulation >= self.thresholds['manipulation_high']
-        }
+        levels = {}
+        high = {}
+        for name, score in values.items():
+            high_threshold = self.thresholds[f'{name}_high']
+            high[name] = score >= high_threshold
+            if high[name]:
+                levels[name] = 'высокий'
+            elif score >= high_threshold * 0.6:  # Medium threshold at 60% of high
+                levels[name] = 'средний'
+            else:
+                levels[name] = 'низкий'
+        
+        return values, levels, high
 
 
 class EmotionAnalysisIntegration:
@@ -336,15 +367,12 @@ class EmotionAnalysisIntegration:
         emotion_scores = await self.analyzer.analyze_emotions(text)
         
         # Add emotion data to processing result
+        scores, levels, high = self.analyzer.summarize(emotion_scores)
         enhanced_result = processing_result.copy()
         enhanced_result.update({
-            'emotion_scores': {
-                'sarcasm': emotion_scores.sarcasm,
-                'toxicity': emotion_scores.toxicity,
-                'manipulation': emotion_scores.manipulation
-            },
-            'emotion_levels': self.analyzer.get_emotion_levels(emotion_scores),
-            'emotion_high': self.analyzer.has_high_emotion(emotion_scores),
+            'emotion_scores': scores,
+            'emotion_levels': levels,
+            'emotion_high': high,
             'emotion_processing_time': emotion_scores.processing_time,
             'emotion_error': emotion_scores.error_message
         })
@@ -0,0 +1,31 @@
+"""
+JSON helpers for Telegram Voice-to-Insight Bot
+
+Uses orjson (C/Rust-backed, bytes in/out) when installed and falls back to
+the stdlib json module otherwise, so the bot still runs without the wheel.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes (mode files)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
@@ -0,0 +1,32 @@
+"""
+Inline Keyboards for Telegram Voice-to-Insight Bot
+
+All keyboards here are static, so they are built once at import and shared.
+aiogram types are frozen pydantic models, so sharing instances across
+messages is safe.
+"""
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+# Transcript buttons attached to every processed message
+TRANSCRIPT_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="📝 Показать транскрипт", callback_data="transcript"),
+        InlineKeyboardButton(text="📄 Скачать .txt", callback_data="download")
+    ]
+])
+
+# Fallback buttons for voice messages when Redis is unavailable
+VOICE_FALLBACK_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
+        InlineKeyboardButton(text="📄 транскрипт", callback_data="transcript_simple")
+    ]
+])
+
+# Fallback buttons for text messages when Redis is unavailable
+TEXT_FALLBACK_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
+    ]
+])
@@ -8,13 +8,16 @@ import asyncio
 import logging
 import os
 import sys
+import time
+import traceback
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 from typing import Optional
 
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command
-from aiogram.types import Message, ErrorEvent, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.types import Message, ErrorEvent, InlineKeyboardMarkup, CallbackQuery
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 from dotenv import load_dotenv
@@ -24,6 +27,9 @@ from speech_pipeline import SpeechPipelineFactory, SpeechPipelineError
 
 # Import text processing
 from text_processor import TextProcessor
+import transcript_store
+from advice_library import ADVICE_COUNT, get_advice
+from keyboards import TRANSCRIPT_KB
 
 # Import enhanced systems for Phase 3
 # Fully re-enabled for complete functionality
@@ -72,7 +78,9 @@ button_ui_manager = None
 summary_engine = None
 
 # Simple in-memory storage for last messages by chat (no Redis needed)
-chat_last_messages = {}  # {chat_id: {"text": str, "timestamp": float, "type": "voice|text", "user_id": str}}
+# "timestamp" is wall-clock for display, "received_ns" is monotonic for expiry checks
+chat_last_messages = {}  # {chat_id: {"text": str, "timestamp": float, "received_ns": int, "type": "voice|text", "user_id": str}}
+MESSAGE_TTL_NS = 3600 * 1_000_000_000  # 1 hour
 
 # Helper function for SummaryEngine integration
 async def process_with_summary_engine(text: str, content_type: ContentType, duration: Optional[int] = None) -> Optional[str]:
@@ -108,19 +116,22 @@ async def process_with_summary_engine(text: str, content_type: ContentType, dura
         return None
 
 
+def make_partial_editor(processing_msg: Message):
+    """Build an on_partial callback that shows streamed sections in the processing message"""
+    async def on_partial(partial_result) -> None:
+        await processing_msg.edit_text(
+            text_processor.format_output(partial_result) + "\n\n⏳ Анализ продолжается...",
+            parse_mode="Markdown"
+        )
+    return on_partial
+
+
 def create_transcript_buttons() -> InlineKeyboardMarkup:
-    """Create inline keyboard with transcript buttons"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="📝 Показать транскрипт", callback_data="transcript"),
-            InlineKeyboardButton(text="📄 Скачать .txt", callback_data="download")
-        ]
-    ])
-    logger.info("Created transcript buttons with callback_data: transcript, download")
-    return keyboard
-
-
-async def send_transcript_text(message: Message, text: str, chat_id: str, user_id: str = None):
+    """Get inline keyboard with transcript buttons (shared, built once at import)"""
+    return TRANSCRIPT_KB
+
+
+async def send_transcript_text(message: Message, text: str, chat_id: str, user_id: str = None, msg_type: str = "voice"):
     """Send transcript as text or file based on length"""
     logger.info(f"send_transcript_text: text_length={len(text)}, chat_id={chat_id}, user_id={user_id}")
     
@@ -135,22 +146,13 @@ async def send_transcript_text(message: Message, text: str, chat_id: str, user_i
         await message.answer(transcript_text, parse_mode="Markdown")
     else:
         # Send as file
-        from io import BytesIO
-        import time
-        
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"transcript_{user_id}_{timestamp}.txt"
         
-        file_content = f"""ТРАНСКРИПТ СООБЩЕНИЯ
-Дата: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Пользователь: {user_id}
-
-{text}
-
----
-Создано ботом TLDR Buddy"""
+        # Human-readable file is rendered only here, at download time
+        file_content = transcript_store.render_bytes(transcript_store.make_record(user_id, text, msg_type))
         
-        file_obj = BytesIO(file_content.encode('utf-8'))
+        file_obj = BytesIO(file_content)
         file_obj.name = filename
         
         await message.answer_document(
@@ -181,9 +183,9 @@ async def get_last_message_data(chat_id: str, user_id: str = None, reply_to_mess
     last_msg_data = chat_last_messages[chat_id]
     
     # Check if message is not too old (1 hour limit)
-    import time
-    if time.time() - last_msg_data["timestamp"] > 3600:
-        logger.info(f"Message for chat {chat_id} is too old ({(time.time() - last_msg_data['timestamp'])/60:.1f} minutes)")
+    age_ns = time.monotonic_ns() - last_msg_data["received_ns"]
+    if age_ns > MESSAGE_TTL_NS:
+        logger.info(f"Message for chat {chat_id} is too old ({age_ns / 60e9:.1f} minutes)")
         return None
     
     # If user_id is specified, check if it matches
@@ -191,7 +193,7 @@ async def get_last_message_data(chat_id: str, user_id: str = None, reply_to_mess
         logger.info(f"Message in chat {chat_id} belongs to user {last_msg_data.get('user_id')}, not {user_id}")
         return None
     
-    logger.info(f"Found message for chat {chat_id}, type: {last_msg_data['type']}, age: {(time.time() - last_msg_data['timestamp'])/60:.1f} minutes")
+    logger.info(f"Found message for chat {chat_id}, type: {last_msg_data['type']}, age: {age_ns / 60e9:.1f} minutes")
     return last_msg_data
 
 
@@ -382,7 +384,7 @@ async def cmd_summary(message: Message):
         # Fallback to text processor
         if text_processor:
             try:
-                processing_result = await text_processor.process_parallel(text)
+                processing_result = await text_processor.process_fused(text)
                 
                 # Create simplified output
                 simplified_output = f"""📝 **Саммари последнего сообщения**
@@ -460,13 +462,12 @@ async def cmd_transcript(message: Message):
         msg_type = last_msg_data["type"]
         
         # Send transcript as .txt file
-        await send_transcript_text(message, transcript_text.strip(), chat_id, user_id)
+        await send_transcript_text(message, transcript_text.strip(), chat_id, user_id, msg_type)
         
         logger.info(f"Transcript sent to user {user_id}, type: {msg_type}")
         
     except Exception as e:
         logger.error(f"Transcript command failed: {e}")
-        import traceback
         logger.error(f"Transcript error traceback: {traceback.format_exc()}")
         
         # Send detailed error info for debugging
@@ -510,7 +511,7 @@ async def cmd_analysis(message: Message):
         # Process with text processor for psychological analysis
         if text_processor:
             try:
-                processing_result = await text_processor.process_parallel(message_text)
+                processing_result = await text_processor.process_fused(message_text)
                 
                 # Create psychological analysis output
                 analysis_text = f"""🎭 **ПСИХОЛОГИЧЕСКИЙ АНАЛИЗ**
@@ -582,7 +583,7 @@ async def cmd_layers(message: Message):
         if text_processor:
             try:
                 # Get full analysis with emotion detection
-                processing_result = await text_processor.process_parallel(message_text)
+                processing_result = await text_processor.process_fused(message_text)
                 
                 # Extract emotion analysis if available
                 emotion_analysis = ""
@@ -656,8 +657,7 @@ async def cmd_debug(message: Message):
         
         if chat_id in chat_last_messages:
             last_msg_data = chat_last_messages[chat_id]
-            import time
-            age_seconds = int(time.time() - last_msg_data["timestamp"])
+            age_seconds = (time.monotonic_ns() - last_msg_data["received_ns"]) // 1_000_000_000
             age_minutes = age_seconds // 60
             
             debug_info += f"""✅ **Ваше последнее сообщение найдено**:
@@ -727,33 +727,9 @@ async def cmd_advice(message: Message):
         msg_type = last_msg_data["type"]
         timestamp_stored = last_msg_data["timestamp"]
         
-        # Generate advice based on user ID (4 different archetypes)
-        advice_responses = [
-            {
-                "title": "💡 Совет мудреца",
-                "text": "Найдите время подумать над ключевыми моментами из сообщения. Что самое важное? Какие долгосрочные последствия? Иногда лучшее решение приходит после паузы и размышления.",
-                "style": "Глубокий анализ"
-            },
-            {
-                "title": "🎭 Творческий подход", 
-                "text": "Попробуйте взглянуть на ситуацию с неожиданной стороны. Какие альтернативы вы видите? Что, если подойти к вопросу совершенно по-другому? Креативность часто рождает лучшие решения.",
-                "style": "Нестандартное мышление"
-            },
-            {
-                "title": "❤️ Эмпатический взгляд",
-                "text": "Учтите эмоциональную составляющую ситуации. Что чувствуют все участники? Как ваши действия могут повлиять на отношения? Понимание эмоций часто ключ к решению.",
-                "style": "Эмоциональный интеллект"
-            },
-            {
-                "title": "🃏 Игровая перспектива",
-                "text": "Иногда лучший совет - не принимать всё слишком серьезно. Можно ли найти здесь что-то позитивное или забавное? Легкость и юмор помогают справиться с трудностями.",
-                "style": "Позитивный настрой"
-            }
-        ]
-        
-        # Select response based on user ID
-        response_index = hash(str(user_id)) % len(advice_responses)
-        selected_response = advice_responses[response_index]
+        # Select advice based on user ID (4 different archetypes)
+        response_index = hash(str(user_id)) % ADVICE_COUNT
+        selected_response = get_advice(response_index)
         
         # Create advice message
         advice_text = f"""
@@ -814,11 +790,11 @@ async def handle_voice_message(message: Message):
             )
             
             # Store the transcribed text for commands
-            import time
             chat_id = str(message.chat.id)
             chat_last_messages[chat_id] = {
                 "text": transcribed_text,
                 "timestamp": time.time(),
+                "received_ns": time.monotonic_ns(),
                 "type": "voice",
                 "user_id": user_id
             }
@@ -846,7 +822,9 @@ async def handle_voice_message(message: Message):
                 # Fallback to original text processor
                 if text_processor:
                     try:
-                        processing_result = await text_processor.process_parallel(transcribed_text)
+                        processing_result = await text_processor.process_fused(
+                            transcribed_text, on_partial=make_partial_editor(processing_msg)
+                        )
                         formatted_output = text_processor.format_output(processing_result)
                         
                         # Create simplified output - keep practical insights including actions
@@ -971,11 +949,11 @@ async def handle_video_note(message: Message):
             )
             
             # Store the transcribed text for commands
-            import time
             chat_id = str(message.chat.id)
             chat_last_messages[chat_id] = {
                 "text": transcribed_text,
                 "timestamp": time.time(),
+                "received_ns": time.monotonic_ns(),
                 "type": "video",
                 "user_id": user_id
             }
@@ -1002,7 +980,9 @@ async def handle_video_note(message: Message):
                 # Fallback to original text processor
                 if text_processor:
                     try:
-                        processing_result = await text_processor.process_parallel(transcribed_text)
+                        processing_result = await text_processor.process_fused(
+                            transcribed_text, on_partial=make_partial_editor(processing_msg)
+                        )
                         formatted_output = text_processor.format_output(processing_result)
                         
                         # Create simplified output for video notes
@@ -1119,11 +1099,11 @@ async def handle_text_message(message: Message):
                    f"length: {len(text_content)} chars")
         
         # Store the text for commands
-        import time
         chat_id = str(message.chat.id)
         chat_last_messages[chat_id] = {
             "text": text_content,
             "timestamp": time.time(),
+            "received_ns": time.monotonic_ns(),
             "type": "text",
             "user_id": user_id
         }
@@ -1135,7 +1115,9 @@ async def handle_text_message(message: Message):
         # Process text through enhanced pipeline with emotion analysis
         if text_processor:
             try:
-                processing_result = await text_processor.process_parallel(text_content)
+                processing_result = await text_processor.process_fused(
+                    text_content, on_partial=make_partial_editor(processing_msg)
+                )
                 formatted_output = text_processor.format_output(processing_result)
                 
                 # Create simplified output for text messages
@@ -1454,13 +1436,10 @@ async def handle_button_callback(callback_query: CallbackQuery):
         logger.info(f"Callback received: data='{data}', user_id={user_id}, chat_id={chat_id}")
         
         # Handle transcript buttons
-        if data == "transcript":
-            logger.info(f"Handling transcript button for user {user_id} in chat {chat_id}")
-            await handle_transcript_button(callback_query)
-            return
-        elif data == "download":
-            logger.info(f"Handling download button for user {user_id} in chat {chat_id}")
-            await handle_download_button(callback_query)
+        handler = CALLBACK_ROUTES.get(data)
+        if handler:
+            logger.info(f"Handling {data} button for user {user_id} in chat {chat_id}")
+            await handler(callback_query)
             return
         
         # Handle Redis-dependent features
@@ -1508,7 +1487,7 @@ async def handle_transcript_button(callback_query: CallbackQuery):
         transcript_text = last_msg_data["text"]
         
         # Send transcript using the same logic as /transcript command
-        await send_transcript_text(callback_query.message, transcript_text.strip(), chat_id, user_id)
+        await send_transcript_text(callback_query.message, transcript_text.strip(), chat_id, user_id, last_msg_data["type"])
         await callback_query.answer("✅ Транскрипт отправлен")
             
     except Exception as e:
@@ -1535,7 +1514,7 @@ async def handle_download_button(callback_query: CallbackQuery):
         text = last_msg_data["text"]
         
         # Always send as file for download button
-        await send_transcript_text(callback_query.message, text, chat_id, user_id)
+        await send_transcript_text(callback_query.message, text, chat_id, user_id, last_msg_data["type"])
         await callback_query.answer("✅ Файл отправлен")
         
     except Exception as e:
@@ -1543,6 +1522,13 @@ async def handle_download_button(callback_query: CallbackQuery):
         await callback_query.answer("❌ Ошибка при скачивании файла", show_alert=True)
 
 
+# Static callback_data -> handler dispatch for buttons that work without Redis
+CALLBACK_ROUTES = {
+    "transcript": handle_transcript_button,
+    "download": handle_download_button,
+}
+
+
 @dp.error()
 async def error_handler(event: ErrorEvent):
     """Global error handler"""
@@ -1662,7 +1648,8 @@ async def startup():
         # Initialize archetype system
         logger.info("Initializing archetype system...")
         if text_processor and text_processor.client:
-            archetype_system = create_archetype_system(text_processor.client)
+            # Not routed through text_processor's request limiter, so keep the SDK retries
+            archetype_system = create_archetype_system(text_processor.client.with_options(max_retries=2))
             logger.info("✓ Archetype system initialized")
         else:
             archetype_system = None
@@ -1686,7 +1673,7 @@ async def startup():
         logger.info("Initializing SummaryEngine...")
         if text_processor and text_processor.client:
             try:
-                summary_engine = create_summary_engine(text_processor.client)
+                summary_engine = create_summary_engine(text_processor.client.with_options(max_retries=2))
                 # Enable SummaryEngine if feature flag is set
                 if os.getenv('TLDRBUDDY_ENABLED', 'false').lower() == 'true':
                     summary_engine.enable()
@@ -1802,6 +1789,8 @@ async def main():
                 logger.info("🧹 Cleaning up...")
                 await bot.delete_webhook()
                 await runner.cleanup()
+                if text_processor:
+                    await text_processor.aclose()
                 
         except Exception as e:
             logger.error(f"💥 Failed to start webhook server: {e}")
@@ -1816,7 +1805,11 @@ async def main():
         await startup()
         
         # Start polling
-        await dp.start_polling(bot)
+        try:
+            await dp.start_polling(bot)
+        finally:
+            if text_processor:
+                await text_processor.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""
+OpenAI Request Limiter for Telegram Voice-to-Insight Bot
+
+Caps the number of in-flight OpenAI requests across all users and retries
+rate-limit, timeout, connection and 5xx errors with exponential backoff and
+jitter, so bursts of messages stay under the account rate limit instead of
+failing with 429s.
+
+The OpenAI client must be built with max_retries=0: SDK retries would run
+on top of these attempts and sleep while holding a concurrency slot.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Transient failures the SDK would otherwise retry itself (it runs with
+# max_retries=0): 429s, timeouts, dropped/stale connections and 5xx responses
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+    asyncio.TimeoutError
+)
+
+
+class RequestLimiter:
+    """Global concurrency cap plus retry-with-backoff for OpenAI calls"""
+
+    def __init__(self, max_concurrency: int = 8, max_attempts: int = 5, max_backoff: float = 60.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.max_backoff = max_backoff
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any,
+                   attempt_timeout: Optional[float] = None, max_attempts: Optional[int] = None,
+                   **kwargs: Any) -> T:
+        """
+        Run func(*args, **kwargs) under the concurrency cap, retrying transient errors.
+
+        attempt_timeout bounds each attempt (not the slot wait or backoff);
+        a timed-out attempt is retried like an API timeout. max_attempts
+        overrides the limiter default for interactive calls that cannot
+        wait through a long retry series. The slot is released while backing
+        off so waiting retries do not block other requests.
+        """
+        async with self.hold(func, *args, attempt_timeout=attempt_timeout,
+                             max_attempts=max_attempts, **kwargs) as result:
+            return result
+
+    @asynccontextmanager
+    async def hold(self, func: Callable[..., Awaitable[T]], *args: Any,
+                   attempt_timeout: Optional[float] = None, max_attempts: Optional[int] = None,
+                   **kwargs: Any) -> AsyncIterator[T]:
+        """
+        Like call(), but keep the slot until the with-block exits.
+
+        Used for streamed completions, whose body is read after create()
+        returns and must still count against the cap.
+        """
+        attempts = max(1, max_attempts or self.max_attempts)
+        for attempt in range(attempts):
+            await self._acquire()
+            try:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout=attempt_timeout)
+            except RETRYABLE_ERRORS as e:
+                self._sem.release()
+                if attempt + 1 >= attempts:
+                    raise
+                delay = min(self.max_backoff, 2 ** attempt + random.random())
+                logger.warning(f"OpenAI {type(e).__name__}, retry {attempt + 1}/{attempts - 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self._sem.release()
+                raise
+            try:
+                yield result
+            finally:
+                self._sem.release()
+            return
+
+    async def _acquire(self) -> None:
+        """Take a concurrency slot, logging noticeable waits"""
+        wait_start = time.perf_counter()
+        await self._sem.acquire()
+        wait_time = time.perf_counter() - wait_start
+        if wait_time > 0.05:
+            logger.info(f"OpenAI request waited {wait_time:.2f}s for a concurrency slot")
@@ -0,0 +1,50 @@
+"""
+In-process LLM Response Cache for Telegram Voice-to-Insight Bot
+
+Exact-match LRU cache for model responses, so repeated transcripts
+(retries, forwards, test traffic) skip the OpenAI round-trip entirely.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Build a compact cache key from request parts (mode, model, prompt, text, ...)"""
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cached value and mark it most recently used"""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value, evicting the least recently used entry if over capacity"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -68,7 +68,7 @@ class SpeechPipeline:
             SpeechPipelineError: If processing fails at any stage
         """
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         audio_start_time = None
         speech_start_time = None
         
@@ -76,10 +76,10 @@ class SpeechPipeline:
             logger.info(f"Starting speech pipeline for file {file_id}, user {user_id}")
             
             # 1. Audio processing phase
-            audio_start_time = time.time()
+            audio_start_time = time.perf_counter()
             try:
                 audio_data = await self.audio_processor.process_audio(file_id)
-                audio_processing_time = time.time() - audio_start_time
+                audio_processing_time = time.perf_counter() - audio_start_time
                 
                 logger.info(f"Audio processing completed in {audio_processing_time:.2f}s, "
                            f"got {len(audio_data)} bytes")
@@ -89,7 +89,7 @@ class SpeechPipeline:
                 raise SpeechPipelineError(f"Audio processing failed: {str(e)}")
             
             # 2. Speech recognition phase
-            speech_start_time = time.time()
+            speech_start_time = time.perf_counter()
             try:
                 context = TranscriptionContext(
                     user_id=user_id,
@@ -104,7 +104,7 @@ class SpeechPipeline:
                     chat_id=chat_id
                 )
                 
-                speech_processing_time = time.time() - speech_start_time
+                speech_processing_time = time.perf_counter() - speech_start_time
                 
                 logger.info(f"Speech recognition completed in {speech_processing_time:.2f}s, "
                            f"detected language: {result.language}, "
@@ -122,7 +122,7 @@ class SpeechPipeline:
                     raise SpeechPipelineError(f"Speech recognition failed: {str(e)}")
             
             # 3. Record success metrics
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             self._record_success(total_time, audio_processing_time, speech_processing_time)
             
             logger.info(f"Pipeline completed successfully in {total_time:.2f}s total "
@@ -150,7 +150,7 @@ class SpeechPipeline:
             Dictionary with transcription text and processing metadata
         """
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Get detailed transcription result
@@ -167,7 +167,7 @@ class SpeechPipeline:
                 context=context
             )
             
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             
             return {
                 'text': result.text,
@@ -19,7 +19,7 @@ import aiofiles
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptionResult:
     """Result container for transcription operations"""
     text: str
@@ -345,7 +345,7 @@ class HybridSpeechRecognizer:
         Main transcription method with smart language detection and optimization
         """
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # 1. Get language hint from user preferences or context
@@ -373,7 +373,7 @@ class HybridSpeechRecognizer:
                     )
                     
                     # 5. Monitor performance
-                    processing_time = time.time() - start_time
+                    processing_time = time.perf_counter() - start_time
                     if user_id:
                         await self.performance_monitor.record_transcription(
                             user_id, processing_time, len(audio_data), 
@@ -417,7 +417,7 @@ class HybridSpeechRecognizer:
                                   start_time: float) -> TranscriptionResult:
         """Post-process transcription results and update user preferences"""
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         detected_language = api_result.get('language', 'unknown')
         text = api_result.get('text', '')
         
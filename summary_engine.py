@@ -4,7 +4,6 @@ Two-Mode Summary Engine (TLDRBuddy)
 Handles CHAT and LONGFORM summarization modes with automatic routing
 """
 
-import asyncio
 import json
 import logging
 import os
@@ -16,7 +15,7 @@ from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +48,7 @@ class SummaryConfig:
     reasoning_effort: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SummaryResult:
     """Result of summary processing"""
     success: bool
@@ -67,7 +66,7 @@ class SummaryEngine:
     Handles automatic routing between CHAT and LONGFORM modes
     """
     
-    def __init__(self, openai_client: Optional[OpenAI] = None):
+    def __init__(self, openai_client: Optional[AsyncOpenAI] = None):
         self.client = openai_client
         
         # Default configurations for each mode
@@ -249,7 +248,7 @@ class SummaryEngine:
                 error_message="OpenAI client not available"
             )
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # Determine mode
@@ -285,16 +284,13 @@ class SummaryEngine:
                 params["reasoning_effort"] = config.reasoning_effort
             
             # Call OpenAI API
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                **params
-            )
+            response = await self.client.chat.completions.create(**params)
             
             # Extract result
             summary = response.choices[0].message.content
             token_count = response.usage.total_tokens if response.usage else None
             
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             
             logger.info(f"Summary completed in {processing_time:.2f}s, "
                        f"tokens: {token_count}, mode: {mode}")
@@ -309,7 +305,7 @@ class SummaryEngine:
             )
             
         except Exception as e:
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             logger.error(f"Summary processing failed: {e}")
             
             return SummaryResult(
@@ -376,12 +372,12 @@ class SummaryEngine:
 
 
 # Factory function for creating SummaryEngine
-def create_summary_engine(openai_client: Optional[OpenAI] = None) -> SummaryEngine:
+def create_summary_engine(openai_client: Optional[AsyncOpenAI] = None) -> SummaryEngine:
     """
     Create and configure SummaryEngine instance
     
     Args:
-        openai_client: OpenAI client instance
+        openai_client: Async OpenAI client instance
         
     Returns:
         Configured SummaryEngine instance
@@ -201,7 +201,7 @@ async def init_test_systems():
         
         # Initialize archetype system
         if text_processor and text_processor.client:
-            archetype_system = create_archetype_system(text_processor.client)
+            archetype_system = create_archetype_system(text_processor.client.with_options(max_retries=2))
             logger.info("✓ Archetype system initialized")
         else:
             logger.warning("Archetype system disabled")
@@ -7,19 +7,14 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from keyboards import VOICE_FALLBACK_KB, TEXT_FALLBACK_KB
 
 def test_simple_buttons():
     """Test creating simple buttons without Redis"""
     print("🧪 Testing simple button creation...")
     
-    # Create simple buttons without Redis as fallback
-    reply_markup = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
-            InlineKeyboardButton(text="📄 транскрипт", callback_data="transcript_simple")
-        ]
-    ])
+    # Simple buttons without Redis as fallback (shared instance)
+    reply_markup = VOICE_FALLBACK_KB
     
     print("✅ Buttons created successfully!")
     print(f"Button count: {len(reply_markup.inline_keyboard[0])}")
@@ -32,11 +27,7 @@ def test_text_only_buttons():
     """Test creating text-only buttons"""
     print("\n🧪 Testing text-only button creation...")
     
-    reply_markup = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
-        ]
-    ])
+    reply_markup = TEXT_FALLBACK_KB
     
     print("✅ Text-only buttons created successfully!")
     print(f"Button count: {len(reply_markup.inline_keyboard[0])}")
@@ -7,6 +7,8 @@ from datetime import datetime
 from pathlib import Path
 import time
 
+import transcript_store
+from advice_library import ADVICE_COUNT, get_advice
 
 def test_user_message_storage():
     """Test in-memory user message storage logic"""
@@ -26,6 +28,7 @@ def test_user_message_storage():
         user_last_messages[case["user_id"]] = {
             "text": case["text"],
             "timestamp": time.time(),
+            "received_ns": time.monotonic_ns(),
             "type": case["type"]
         }
     
@@ -43,38 +46,15 @@ def test_advice_generation():
     """Test advice generation logic"""
     print("\n🧪 Testing advice generation...")
     
-    advice_responses = [
-        {
-            "title": "💡 Совет мудреца",
-            "text": "Найдите время подумать над ключевыми моментами из сообщения.",
-            "style": "Глубокий анализ"
-        },
-        {
-            "title": "🎭 Творческий подход", 
-            "text": "Попробуйте взглянуть на ситуацию с неожиданной стороны.",
-            "style": "Нестандартное мышление"
-        },
-        {
-            "title": "❤️ Эмпатический взгляд",
-            "text": "Учтите эмоциональную составляющую ситуации.",
-            "style": "Эмоциональный интеллект"
-        },
-        {
-            "title": "🃏 Игровая перспектива",
-            "text": "Иногда лучший совет - не принимать всё слишком серьезно.",
-            "style": "Позитивный настрой"
-        }
-    ]
-    
     # Test selection logic for different users
     test_users = ["123", "456", "789", "101112"]
     
     for user_id in test_users:
-        response_index = hash(str(user_id)) % len(advice_responses)
-        selected_response = advice_responses[response_index]
+        response_index = hash(str(user_id)) % ADVICE_COUNT
+        selected_response = get_advice(response_index)
         print(f"  - User {user_id}: {selected_response['title']} ({selected_response['style']})")
     
-    return len(advice_responses) == 4
+    return ADVICE_COUNT == 4
 
 
 def test_transcript_file_creation():
@@ -88,38 +68,38 @@ def test_transcript_file_creation():
         msg_type = "voice"
         timestamp_stored = time.time()
         
-        # Create content
+        # Create content with the same renderer /transcript uses
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        
-        transcript_content = f"""ТРАНСКРИПТ СООБЩЕНИЯ
-Дата создания: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-Пользователь: {user_id}
-Тип сообщения: {msg_type}
-Время обработки: {datetime.fromtimestamp(timestamp_stored).strftime("%Y-%m-%d %H:%M:%S")}
-
-СОДЕРЖАНИЕ:
-{transcript_text.strip()}
-
----
-Создано ботом Voice-to-Insight Pipeline
-Команда: /transcript
-"""
+        record = transcript_store.make_record(user_id, transcript_text, msg_type, created=timestamp_stored)
+        transcript_content = transcript_store.render_bytes(record)
         
         # Test file operations
         temp_dir = Path("temp")
         temp_dir.mkdir(exist_ok=True)
         
         transcript_file = temp_dir / f"transcript_{user_id}_{timestamp}.txt"
-        transcript_file.write_text(transcript_content, encoding='utf-8')
+        writer = transcript_store.AsyncArtifactWriter()
+        try:
+            writer.write(transcript_file, transcript_content)
+            writer.flush_sync()
+        finally:
+            writer.close()
+        
+        # flush_sync() raises on failure, so a clean return means the file is there
+        file_exists = True
+        file_size = len(transcript_content)
         
-        # Verify file
-        file_exists = transcript_file.exists()
-        file_size = transcript_file.stat().st_size if file_exists else 0
+        # Rendered file carries the production header, metadata, text and footer
+        layout_ok = (
+            transcript_content.startswith("ТРАНСКРИПТ СООБЩЕНИЯ\n".encode('utf-8'))
+            and f"Пользователь: {user_id}".encode('utf-8') in transcript_content
+            and transcript_text.encode('utf-8') in transcript_content
+            and transcript_content.endswith("Создано ботом TLDR Buddy".encode('utf-8'))
+        )
         
-        # Read back content
+        # Read back content - durable write must leave it byte-for-byte unchanged
         if file_exists:
-            read_content = transcript_file.read_text(encoding='utf-8')
-            content_match = transcript_text in read_content
+            content_match = transcript_file.read_bytes() == transcript_content
         else:
             content_match = False
         
@@ -127,13 +107,14 @@ def test_transcript_file_creation():
         print(f"  - File created: {'✅' if file_exists else '❌'}")
         print(f"  - File size: {file_size} bytes")
         print(f"  - Content preserved: {'✅' if content_match else '❌'}")
+        print(f"  - Layout matches /transcript: {'✅' if layout_ok else '❌'}")
         
         # Cleanup
         if file_exists:
             transcript_file.unlink()
             print(f"  - File cleaned up: ✅")
         
-        return file_exists and content_match
+        return file_exists and content_match and layout_ok
         
     except Exception as e:
         print(f"❌ File creation test failed: {e}")
@@ -152,12 +133,13 @@ def test_command_flow():
     user_last_messages[user_id] = {
         "text": "Тестовое сообщение для проверки команд",
         "timestamp": time.time(),
+        "received_ns": time.monotonic_ns(),
         "type": "voice"
     }
     
     # Step 2: Check if /transcript would work
     has_message = user_id in user_last_messages
-    message_recent = (time.time() - user_last_messages[user_id]["timestamp"]) < 3600
+    message_recent = (time.monotonic_ns() - user_last_messages[user_id]["received_ns"]) < 3600 * 1_000_000_000
     
     # Step 3: Check if /advice would work
     advice_available = has_message and message_recent
@@ -12,27 +12,23 @@ from pathlib import Path
 # Add project directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+import transcript_store
+from keyboards import VOICE_FALLBACK_KB, TEXT_FALLBACK_KB
+from advice_library import ADVICE_COUNT, get_advice
 
 
 def test_fallback_button_creation():
     """Test creating fallback buttons"""
     print("🧪 Testing fallback button creation...")
     
-    # Test voice message buttons
-    voice_buttons = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
-            InlineKeyboardButton(text="📄 транскрипт", callback_data="transcript_simple")
-        ]
-    ])
-    
-    # Test text message buttons  
-    text_buttons = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🤖 совет", callback_data="advice_simple"),
-        ]
-    ])
+    # Keyboards are module-level singletons - every import yields the same instance
+    import keyboards
+    voice_buttons = VOICE_FALLBACK_KB
+    text_buttons = TEXT_FALLBACK_KB
+    
+    if voice_buttons is not keyboards.VOICE_FALLBACK_KB or text_buttons is not keyboards.TEXT_FALLBACK_KB:
+        print("❌ Keyboards were re-constructed instead of shared")
+        return None, None
     
     print("✅ Voice message buttons created:")
     print(f"  - Button count: {len(voice_buttons.inline_keyboard[0])}")
@@ -100,21 +96,14 @@ def test_advice_generation():
     """Test advice generation without OpenAI"""
     print("\n🧪 Testing advice generation...")
     
-    # Test advice responses (from main.py)
-    advice_responses = [
-        "💡 **Совет мудреца**: Найдите время подумать над ключевыми моментами из сообщения. Что самое важное?",
-        "🎭 **Творческий подход**: Попробуйте взглянуть на ситуацию с неожиданной стороны. Какие альтернативы вы видите?", 
-        "❤️ **Эмпатический взгляд**: Учтите эмоциональную составляющую. Что чувствуют участники ситуации?",
-        "🃏 **Игровая перспектива**: Иногда лучший совет - не принимать всё слишком серьезно. Можно ли найти здесь что-то позитивное?"
-    ]
-    
-    # Test selection logic
+    # Test selection logic (same as /advice in main.py)
     test_user_id = 12345
-    response_index = hash(str(test_user_id)) % len(advice_responses)
-    selected_advice = advice_responses[response_index]
+    response_index = hash(str(test_user_id)) % ADVICE_COUNT
+    advice = get_advice(response_index)
+    selected_advice = f"{advice['title']}: {advice['text']}"
     
     print(f"✅ Advice generation test:")
-    print(f"  - Available responses: {len(advice_responses)}")
+    print(f"  - Available responses: {ADVICE_COUNT}")
     print(f"  - Test user ID: {test_user_id}")
     print(f"  - Selected index: {response_index}")
     print(f"  - Selected advice: {selected_advice}")
@@ -135,35 +124,39 @@ def test_file_creation():
         user_id = "test_user"
         test_transcript = "Тестовый транскрипт для проверки создания файла"
         
-        transcript_content = f"""ТРАНСКРИПТ ГОЛОСОВОГО СООБЩЕНИЯ
-Дата: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-Пользователь: {user_id}
-
-ТЕКСТ:
-{test_transcript}
-
----
-Создано ботом Voice-to-Insight Pipeline
-"""
+        record = transcript_store.make_record(user_id, test_transcript, "voice")
         
-        transcript_file = temp_dir / f"transcript_{user_id}_{timestamp}.txt"
-        transcript_file.write_text(transcript_content, encoding='utf-8')
+        transcript_file = temp_dir / f"transcript_{user_id}_{timestamp}.msgpack"
+        payload = transcript_store.pack(record)
+        writer = transcript_store.AsyncArtifactWriter()
+        try:
+            writer.write(transcript_file, payload)
+            writer.flush_sync()
+        finally:
+            writer.close()
         
-        # Verify file was created
-        file_exists = transcript_file.exists()
-        file_size = transcript_file.stat().st_size if file_exists else 0
+        # flush_sync() raises on failure, so a clean return means the file is there
+        file_exists = True
+        file_size = len(payload)
         
         print(f"✅ File creation test:")
         print(f"  - File created: {'✅ Yes' if file_exists else '❌ No'}")
         print(f"  - File size: {file_size} bytes")
         print(f"  - File path: {transcript_file}")
         
+        # Read back and verify msgpack round-trip
+        round_trip = False
+        if file_exists:
+            round_trip = transcript_store.load(transcript_file) == record
+            print(f"  - Round-trip preserved: {'✅ Yes' if round_trip else '❌ No'}")
+            print(f"  - Rendered on download: {'✅ Yes' if test_transcript in transcript_store.render(record) else '❌ No'}")
+        
         # Clean up
         if file_exists:
             transcript_file.unlink()
             print(f"  - File cleaned up: ✅")
         
-        return file_exists
+        return file_exists and round_trip
         
     except Exception as e:
         print(f"❌ File creation test failed: {e}")
@@ -6,6 +6,16 @@ Simple test script to verify fallback functionality logic without external depen
 from datetime import datetime
 from pathlib import Path
 
+import transcript_store
+from advice_library import ADVICE_COUNT, get_advice
+
+# Static callback_data -> handler routing (mirrors CALLBACK_ROUTES in main.py)
+_CALLBACK_ROUTES = {
+    "advice_simple": "advice_handler",
+    "transcript_simple": "transcript_handler",
+    "back_to_result": "back_handler",
+}
+
 
 def test_transcript_extraction():
     """Test transcript extraction from formatted message"""
@@ -62,26 +72,19 @@ def test_advice_generation():
     """Test advice generation without OpenAI"""
     print("\n🧪 Testing advice generation...")
     
-    # Test advice responses (from main.py)
-    advice_responses = [
-        "💡 **Совет мудреца**: Найдите время подумать над ключевыми моментами из сообщения. Что самое важное?",
-        "🎭 **Творческий подход**: Попробуйте взглянуть на ситуацию с неожиданной стороны. Какие альтернативы вы видите?", 
-        "❤️ **Эмпатический взгляд**: Учтите эмоциональную составляющую. Что чувствуют участники ситуации?",
-        "🃏 **Игровая перспектива**: Иногда лучший совет - не принимать всё слишком серьезно. Можно ли найти здесь что-то позитивное?"
-    ]
-    
-    # Test selection logic
+    # Test selection logic (same as /advice in main.py)
     test_user_id = 12345
-    response_index = hash(str(test_user_id)) % len(advice_responses)
-    selected_advice = advice_responses[response_index]
+    response_index = hash(str(test_user_id)) % ADVICE_COUNT
+    advice = get_advice(response_index)
+    selected_advice = f"{advice['title']}: {advice['text']}"
     
     print(f"✅ Advice generation test:")
-    print(f"  - Available responses: {len(advice_responses)}")
+    print(f"  - Available responses: {ADVICE_COUNT}")
     print(f"  - Test user ID: {test_user_id}")
     print(f"  - Selected index: {response_index}")
     print(f"  - Selected advice: {selected_advice[:50]}...")
     
-    return len(advice_responses) == 4 and selected_advice
+    return ADVICE_COUNT == 4 and selected_advice
 
 
 def test_file_creation():
@@ -97,41 +100,39 @@ def test_file_creation():
         user_id = "test_user"
         test_transcript = "Тестовый транскрипт для проверки создания файла"
         
-        transcript_content = f"""ТРАНСКРИПТ ГОЛОСОВОГО СООБЩЕНИЯ
-Дата: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-Пользователь: {user_id}
-
-ТЕКСТ:
-{test_transcript}
-
----
-Создано ботом Voice-to-Insight Pipeline
-"""
+        record = transcript_store.make_record(user_id, test_transcript, "voice")
         
-        transcript_file = temp_dir / f"transcript_{user_id}_{timestamp}.txt"
-        transcript_file.write_text(transcript_content, encoding='utf-8')
+        transcript_file = temp_dir / f"transcript_{user_id}_{timestamp}.msgpack"
+        payload = transcript_store.pack(record)
+        writer = transcript_store.AsyncArtifactWriter()
+        try:
+            writer.write(transcript_file, payload)
+            writer.flush_sync()
+        finally:
+            writer.close()
         
-        # Verify file was created
-        file_exists = transcript_file.exists()
-        file_size = transcript_file.stat().st_size if file_exists else 0
+        # flush_sync() raises on failure, so a clean return means the file is there
+        file_exists = True
+        file_size = len(payload)
         
         print(f"✅ File creation test:")
         print(f"  - File created: {'✅ Yes' if file_exists else '❌ No'}")
         print(f"  - File size: {file_size} bytes")
         print(f"  - File path: {transcript_file}")
         
-        # Read back and verify content
+        # Read back and verify msgpack round-trip
+        round_trip = False
         if file_exists:
-            read_content = transcript_file.read_text(encoding='utf-8')
-            content_match = test_transcript in read_content
-            print(f"  - Content preserved: {'✅ Yes' if content_match else '❌ No'}")
+            round_trip = transcript_store.load(transcript_file) == record
+            print(f"  - Round-trip preserved: {'✅ Yes' if round_trip else '❌ No'}")
+            print(f"  - Rendered on download: {'✅ Yes' if test_transcript in transcript_store.render(record) else '❌ No'}")
         
         # Clean up
         if file_exists:
             transcript_file.unlink()
             print(f"  - File cleaned up: ✅")
         
-        return file_exists
+        return file_exists and round_trip
         
     except Exception as e:
         print(f"❌ File creation test failed: {e}")
@@ -152,14 +153,7 @@ def test_button_callback_data():
     # Test routing logic
     results = {}
     for callback_data in callback_patterns:
-        if callback_data == "advice_simple":
-            results[callback_data] = "advice_handler"
-        elif callback_data == "transcript_simple":
-            results[callback_data] = "transcript_handler"
-        elif callback_data == "back_to_result":
-            results[callback_data] = "back_handler"
-        else:
-            results[callback_data] = "unknown"
+        results[callback_data] = _CALLBACK_ROUTES.get(callback_data, "unknown")
     
     print(f"✅ Callback routing test:")
     for pattern, handler in results.items():
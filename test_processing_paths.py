@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Test script for the OpenAI-facing processing paths with a mocked client:
+retries, request coalescing, result caching, BATCH/FUSED modes and the
+Batch API polling
+"""
+
+import asyncio
+import json
+import sys
+import os
+from dataclasses import replace
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import openai
+
+from request_limiter import RequestLimiter
+from text_processor import TextProcessor
+
+
+DEFAULT_JSON = json.dumps({
+    "summary": "Созвон с командой завтра.",
+    "bullets": ["Новый проект", "Бюджет"],
+    "actions": ["Созвониться — я — завтра — P1"],
+    "questions": ["Какой бюджет?"],
+    "risks": []
+}, ensure_ascii=False)
+
+TONE_TEXT = """🧠 ПСИХО-СНИМОК:
+• 🎯 СКРЫТОЕ НАМЕРЕНИЕ: договориться
+• 😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ: спокойствие
+• 🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ: коротко по пунктам"""
+
+EMOTION_JSON = '{"sarcasm": 0.1, "toxicity": 0.0, "manipulation": 0.8}'
+
+FUSED_JSON = json.dumps({
+    "summary": "Одним запросом.",
+    "bullets": ["Пункт"],
+    "actions": [],
+    "questions": [],
+    "risks": [],
+    "tone": {"hidden_intent": "уточнить условия", "dominant_emotion": "", "interaction_style": "кратко"},
+    "emotions": {"sarcasm": 0.9, "toxicity": 0.2, "manipulation": 0.0}
+}, ensure_ascii=False)
+
+
+def rate_limit_error():
+    """RateLimitError as raised by the SDK for a 429 response"""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+
+
+def connection_error():
+    """APIConnectionError as raised by the SDK for a dropped connection"""
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+class FakeCompletions:
+    """Stand-in for AsyncOpenAI().chat.completions recording every create() call"""
+
+    def __init__(self, processor, delay=0.0):
+        self.processor = processor
+        self.delay = delay
+        self.calls = []
+        # Exceptions raised (in order) by the next create() calls
+        self.failures = []
+        # Content overrides by mode name ("DEFAULT", "TONE", "BATCH", "FUSED", "EMOTION")
+        self.replies = {}
+
+    def mode_of(self, kwargs):
+        """Name of the mode a request was made for, from its system message"""
+        system = kwargs["messages"][0]
+        for name in ("DEFAULT", "TONE", "BATCH", "FUSED"):
+            mode = self.processor.mode_manager.get_mode(name)
+            if mode and system == mode.system_message:
+                return name
+        return "EMOTION"
+
+    async def create(self, **kwargs):
+        mode = self.mode_of(kwargs)
+        self.calls.append(mode)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+
+        if mode in self.replies:
+            content = self.replies[mode](kwargs) if callable(self.replies[mode]) else self.replies[mode]
+        else:
+            content = {"DEFAULT": DEFAULT_JSON, "TONE": TONE_TEXT, "FUSED": FUSED_JSON}.get(mode, EMOTION_JSON)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_processor(delay=0.0):
+    """TextProcessor whose OpenAI client is replaced by FakeCompletions"""
+    processor = TextProcessor("test-key")
+    # No real waiting between retries
+    processor.request_limiter = RequestLimiter(max_concurrency=8, max_attempts=3, max_backoff=0.0)
+    processor.emotion_analyzer.request_limiter = processor.request_limiter
+
+    completions = FakeCompletions(processor, delay)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    processor.client = client
+    processor.emotion_analyzer.client = client
+    return processor, completions
+
+
+def test_limiter_retries():
+    """Test that transient errors are retried and the final one is raised"""
+    print("🧪 Testing request limiter retries...")
+
+    async def run():
+        limiter = RequestLimiter(max_concurrency=1, max_attempts=3, max_backoff=0.0)
+        errors = [rate_limit_error(), connection_error()]
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        result = await limiter.call(flaky)
+        retried = len(calls)
+
+        async def always_failing():
+            calls.append(1)
+            raise connection_error()
+
+        calls.clear()
+        try:
+            await limiter.call(always_failing, max_attempts=2)
+            gave_up = False
+        except openai.APIConnectionError:
+            gave_up = len(calls) == 2
+
+        async def bad_request():
+            calls.append(1)
+            raise ValueError("not retryable")
+
+        calls.clear()
+        try:
+            await limiter.call(bad_request)
+            not_retried = False
+        except ValueError:
+            not_retried = len(calls) == 1
+
+        # Every attempt gave its slot back
+        slot_free = not limiter._sem.locked()
+        return result, retried, gave_up, not_retried, slot_free
+
+    result, retried, gave_up, not_retried, slot_free = asyncio.run(run())
+
+    print(f"✅ Limiter retry test:")
+    print(f"  - Result after 2 transient errors: {result} ({retried} attempts)")
+    print(f"  - Gave up after max_attempts: {gave_up}")
+    print(f"  - Non-transient error not retried: {not_retried}")
+    print(f"  - Slot released: {slot_free}")
+
+    return result == "ok" and retried == 3 and gave_up and not_retried and slot_free
+
+
+def test_parallel_retries_transient_errors():
+    """Test that process_parallel survives a 429 and a dropped connection"""
+    print("\n🧪 Testing process_parallel retries...")
+
+    async def run():
+        processor, completions = make_processor()
+        completions.failures = [rate_limit_error(), connection_error()]
+        result = await processor.process_parallel("Нужно завтра созвониться с командой.")
+        await processor.aclose()
+        return result, completions.calls
+
+    result, calls = asyncio.run(run())
+
+    print(f"✅ Parallel retry test:")
+    print(f"  - Success: {result.success}, summary: {result.summary}")
+    print(f"  - Upstream calls: {calls}")
+
+    return (
+        result.success
+        and result.summary == "Созвон с командой завтра."
+        and result.tone_analysis is not None
+        and result.emotion_scores is not None
+        and len(calls) == 5
+    )
+
+
+def test_concurrent_requests_coalesced():
+    """Test that identical concurrent transcripts share one set of upstream calls"""
+    print("\n🧪 Testing in-flight request coalescing...")
+
+    async def run():
+        processor, completions = make_processor(delay=0.05)
+        first, second = await asyncio.gather(
+            processor.process_parallel("Нужно завтра созвониться с командой."),
+            processor.process_parallel("  нужно завтра созвониться с командой.  ")
+        )
+        inflight_left = len(processor._inflight)
+        await processor.aclose()
+        return first, second, completions.calls, inflight_left
+
+    first, second, calls, inflight_left = asyncio.run(run())
+
+    print(f"✅ Coalescing test:")
+    print(f"  - Upstream calls: {sorted(calls)}")
+    print(f"  - Same summary: {first.summary == second.summary}")
+    print(f"  - Shared result objects: {first is second or first.bullets is second.bullets}")
+
+    return (
+        first.success and second.success
+        and sorted(calls) == ["DEFAULT", "EMOTION", "TONE"]
+        and first.summary == second.summary
+        and first is not second
+        and first.bullets is not second.bullets
+        and inflight_left == 0
+    )
+
+
+def test_cached_result_isolated():
+    """Test that editing a returned result does not change the cached one"""
+    print("\n🧪 Testing result cache isolation...")
+
+    async def run():
+        processor, completions = make_processor()
+        text = "Нужно завтра созвониться с командой."
+
+        first = await processor.process_parallel(text)
+        first.bullets.append("добавлено вызывающим")
+        first.tone_analysis["hidden_intent"] = "изменено"
+        first.emotion_scores["sarcasm"] = 1.0
+
+        second = await processor.process_parallel(text)
+        second.bullets.clear()
+        third = await processor.process_parallel(text)
+
+        # The emotion analyzer keeps its own cache of EmotionScores
+        scores = await processor.emotion_analyzer.analyze_emotions("Другой текст.")
+        scores.sarcasm = 1.0
+        cached_scores = await processor.emotion_analyzer.analyze_emotions("Другой текст.")
+
+        await processor.aclose()
+        return second, third, cached_scores, completions.calls
+
+    second, third, cached_scores, calls = asyncio.run(run())
+
+    print(f"✅ Cache isolation test:")
+    print(f"  - Upstream calls: {len(calls)}")
+    print(f"  - Cached bullets: {third.bullets}")
+    print(f"  - Cached tone: {third.tone_analysis}")
+    print(f"  - Cached emotions: {third.emotion_scores}")
+    print(f"  - Cached EmotionScores: {cached_scores}")
+
+    return (
+        len(calls) == 4
+        and third.bullets == ["Новый проект", "Бюджет"]
+        and third.tone_analysis.get("hidden_intent") == "договориться"
+        and third.emotion_scores["sarcasm"] == 0.1
+        and cached_scores.sarcasm == 0.1
+    )
+
+
+def test_parallel_batch():
+    """Test BATCH mode results and per-item fallback for missing items"""
+    print("\n🧪 Testing process_parallel_batch...")
+
+    def batch_reply(kwargs):
+        items = json.loads(kwargs["messages"][1]["content"])
+        # Drop the last item so it has to fall back to process_parallel
+        return json.dumps({"results": [{
+            "i": item["i"],
+            "summary": "BATCH " + item["t"],
+            "bullets": ["b"],
+            "actions": ["a1", "a2"],
+            "tone": {"hidden_intent": "h", "dominant_emotion": "", "interaction_style": "s"}
+        } for item in items[:-1]]}, ensure_ascii=False)
+
+    async def run():
+        processor, completions = make_processor()
+        completions.replies["BATCH"] = batch_reply
+        completions.failures = [connection_error()]
+        results = await processor.process_parallel_batch(["первый", "второй", "третий"])
+        await processor.aclose()
+        return results, completions.calls
+
+    results, calls = asyncio.run(run())
+
+    print(f"✅ Parallel batch test:")
+    for result in results:
+        print(f"  - {result.summary!r} actions={result.actions!r} tone={result.tone_analysis}")
+    print(f"  - Upstream calls: {calls}")
+
+    return (
+        len(results) == 3
+        and results[0].summary == "BATCH первый"
+        and results[1].summary == "BATCH второй"
+        and results[0].actions == "a1\na2"
+        and results[0].tone_analysis == {"hidden_intent": "h", "interaction_style": "s"}
+        and results[2].summary == "Созвон с командой завтра."
+        and calls.count("BATCH") == 2
+        and sorted(calls[2:]) == ["DEFAULT", "EMOTION", "TONE"]
+    )
+
+
+def test_fused():
+    """Test FUSED mode parsing and fallback to process_parallel"""
+    print("\n🧪 Testing process_fused...")
+
+    async def run():
+        processor, completions = make_processor()
+        text = "Нужно завтра созвониться с командой."
+
+        # FUSED ships disabled: without it process_fused is process_parallel
+        disabled = await processor.process_fused(text)
+        disabled_calls = sorted(completions.calls)
+
+        fused_mode = processor.mode_manager.get_mode("FUSED")
+        processor.mode_manager.modes["FUSED"] = replace(fused_mode, enabled=True)
+
+        completions.calls.clear()
+        fused = await processor.process_fused("Другой текст.")
+        fused_calls = list(completions.calls)
+
+        completions.calls.clear()
+        completions.replies["FUSED"] = '{"summary": "обрыв'
+        fallback = await processor.process_fused("Третий текст.")
+        fallback_calls = sorted(completions.calls)
+
+        await processor.aclose()
+        return disabled, disabled_calls, fused, fused_calls, fallback, fallback_calls
+
+    disabled, disabled_calls, fused, fused_calls, fallback, fallback_calls = asyncio.run(run())
+
+    print(f"✅ Fused test:")
+    print(f"  - Disabled: {disabled.summary!r} via {disabled_calls}")
+    print(f"  - Fused: {fused.summary!r} tone={fused.tone_analysis} emotions={fused.emotion_scores} high={fused.emotion_high}")
+    print(f"  - Invalid JSON: {fallback.summary!r} via {fallback_calls}")
+
+    return (
+        disabled.summary == "Созвон с командой завтра."
+        and disabled_calls == ["DEFAULT", "EMOTION", "TONE"]
+        and fused_calls == ["FUSED"]
+        and fused.summary == "Одним запросом."
+        and fused.tone_analysis == {"hidden_intent": "уточнить условия", "interaction_style": "кратко"}
+        and fused.emotion_scores == {"sarcasm": 0.9, "toxicity": 0.2, "manipulation": 0.0}
+        and fused.emotion_high["sarcasm"] and not fused.emotion_high["toxicity"]
+        and fallback.summary == "Созвон с командой завтра."
+        and fallback_calls == ["DEFAULT", "EMOTION", "FUSED", "TONE"]
+    )
+
+
+def test_poll_batch():
+    """Test Batch API polling for running, failed, expired and completed batches"""
+    print("\n🧪 Testing poll_batch...")
+
+    def output_line(custom_id, content):
+        return json.dumps({"custom_id": custom_id, "response": {
+            "status_code": 200, "body": {"choices": [{"message": {"content": content}}]}
+        }}, ensure_ascii=False)
+
+    files = {
+        # Text 1 has no output at all: both its requests are in the error file
+        "out": "\n".join([output_line("DEFAULT-0", DEFAULT_JSON), output_line("TONE-0", TONE_TEXT)]),
+        "err": "\n".join(json.dumps({"custom_id": f"{mode}-1", "response": None,
+                                     "error": {"code": "server_error"}}) for mode in ("DEFAULT", "TONE"))
+    }
+
+    class Batches:
+        status = "in_progress"
+
+        async def retrieve(self, batch_id):
+            return SimpleNamespace(status=self.status, output_file_id="out", error_file_id="err",
+                                   metadata={"texts": "3"})
+
+    class Files:
+        async def content(self, file_id):
+            return SimpleNamespace(text=files[file_id])
+
+    async def run():
+        processor = TextProcessor("test-key")
+        batches = Batches()
+        processor.client = SimpleNamespace(batches=batches, files=Files())
+
+        statuses = {}
+        for status in ("in_progress", "failed", "expired", "cancelled", "completed"):
+            batches.status = status
+            statuses[status] = await processor.poll_batch("batch-1")
+
+        await processor.aclose()
+        return statuses
+
+    statuses = asyncio.run(run())
+    completed = statuses["completed"]
+
+    print(f"✅ Poll batch test:")
+    for status, results in statuses.items():
+        print(f"  - {status}: {results if results is None or not results else [r.success for r in results]}")
+
+    return (
+        statuses["in_progress"] is None
+        and statuses["failed"] == []
+        and statuses["expired"] == []
+        and statuses["cancelled"] == []
+        and len(completed) == 3
+        and completed[0].success and completed[0].summary == "Созвон с командой завтра."
+        and completed[0].tone_analysis is not None
+        and not completed[1].success and "server_error" in completed[1].error_message
+        and not completed[2].success
+    )
+
+
+def main():
+    """Run all processing path tests"""
+    print("🔍 Testing processing paths with a mocked OpenAI client...\n")
+
+    tests = [
+        ("Limiter Retries", test_limiter_retries),
+        ("Parallel Retries", test_parallel_retries_transient_errors),
+        ("Request Coalescing", test_concurrent_requests_coalesced),
+        ("Cache Isolation", test_cached_result_isolated),
+        ("Parallel Batch", test_parallel_batch),
+        ("Fused Mode", test_fused),
+        ("Batch Polling", test_poll_batch)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ {test_name} failed with error: {e}")
+            results.append((test_name, False))
+
+    # Summary
+    passed = sum(1 for _, success in results if success)
+    total = len(results)
+
+    print(f"\n📊 Test Results:")
+    for test_name, success in results:
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"  - {test_name}: {status}")
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    main()
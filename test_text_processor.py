@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test script to verify DEFAULT/TONE result parsing without OpenAI calls
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from text_processor import JsonFieldScanner, TextProcessor, ProcessingResult
+
+
+SAMPLE_DEFAULT = """📝 РЕЗЮМЕ: Нужно созвониться с командой по новому проекту.
+ОСНОВНЫЕ ПУНКТЫ (3–7):
+• Новый проект
+• Бюджет и сроки
+⚡ ДЕЙСТВИЯ:
+• Созвониться с командой — я — завтра — P1
+• Согласовать бюджет — P2
+❓ ОТКРЫТЫЕ ВОПРОСЫ (если есть):
+• Какой бюджет доступен?
+⚠️ РИСКИ/ОГРАНИЧЕНИЯ (если есть):
+• Сжатые сроки"""
+
+SAMPLE_DEFAULT_JSON = """{"summary": "Нужно созвониться с командой по новому проекту.",
+"bullets": ["Новый проект", "Бюджет и сроки"],
+"actions": ["Созвониться с командой — я — завтра — P1", "Согласовать бюджет — P2"],
+"questions": ["Какой бюджет доступен?"],
+"risks": ["Сжатые сроки"]}"""
+
+SAMPLE_TONE = """🧠 ПСИХО-СНИМОК:
+• 🎯 СКРЫТОЕ НАМЕРЕНИЕ: уточнить условия
+• 😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ: спокойствие
+• 🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ: коротко по пунктам
+• 🔎 ПРИЗНАКИ (цитаты): «нужно созвониться»
+• 🎛 УВЕРЕННОСТЬ: 0.7"""
+
+
+def test_default_parsing():
+    """Test DEFAULT mode result parsing"""
+    print("🧪 Testing DEFAULT result parsing...")
+
+    processor = TextProcessor("test-key")
+    summary, bullets, actions, questions, risks = processor._parse_default_result(SAMPLE_DEFAULT)
+
+    print(f"✅ DEFAULT parsing test:")
+    print(f"  - Summary: {summary}")
+    print(f"  - Bullets: {bullets}")
+    print(f"  - Actions: {actions!r}")
+    print(f"  - Questions: {questions}")
+    print(f"  - Risks: {risks}")
+
+    old_format = processor._parse_default_result("РЕЗЮМЕ: Коротко\nДЕЙСТВИЯ:\nнет явных действий")
+    print(f"  - Old format: {old_format}")
+
+    return (
+        summary == "Нужно созвониться с командой по новому проекту."
+        and bullets == ["Новый проект", "Бюджет и сроки"]
+        and actions == "Созвониться с командой — я — завтра — P1\nСогласовать бюджет — P2"
+        and questions == ["Какой бюджет доступен?"]
+        and risks == ["Сжатые сроки"]
+        and old_format == ("Коротко", None, "нет явных действий", None, None)
+        and processor._parse_default_result(SAMPLE_DEFAULT.replace("\n", "\r\n")) == (summary, bullets, actions, questions, risks)
+        and processor._parse_default_result(None) == (None, None, None, None, None)
+    )
+
+
+def test_default_json_parsing():
+    """Test DEFAULT mode structured (JSON) result parsing"""
+    print("\n🧪 Testing DEFAULT JSON result parsing...")
+
+    processor = TextProcessor("test-key")
+    parsed = processor._parse_default_result(SAMPLE_DEFAULT_JSON)
+    no_actions = processor._parse_default_result('{"summary": "Коротко", "actions": "нет явных действий", "bullets": []}')
+    broken = processor._parse_default_result('{"summary": "обрыв')
+
+    print(f"✅ DEFAULT JSON parsing test:")
+    print(f"  - Parsed: {parsed}")
+    print(f"  - No actions: {no_actions}")
+    print(f"  - Broken JSON: {broken}")
+
+    return (
+        parsed == processor._parse_default_result(SAMPLE_DEFAULT)
+        and no_actions == ("Коротко", None, "нет явных действий", None, None)
+        and broken == (None, None, None, None, None)
+    )
+
+
+def test_json_field_scanner():
+    """Test incremental parsing of a streamed DEFAULT JSON object"""
+    print("\n🧪 Testing streamed JSON field scanning...")
+
+    scanner = JsonFieldScanner()
+    snapshots = []
+    for i in range(0, len(SAMPLE_DEFAULT_JSON), 7):
+        fields = scanner.feed(SAMPLE_DEFAULT_JSON[i:i + 7])
+        if fields is not None:
+            snapshots.append(list(fields))
+
+    print(f"✅ Completed fields per snapshot: {snapshots}")
+
+    return (
+        snapshots[0] == ["summary"]
+        and snapshots[-1] == ["summary", "bullets", "actions", "questions", "risks"]
+        and JsonFieldScanner().feed('{"summary": "a, {b}", "bul') == {"summary": "a, {b}"}
+    )
+
+
+def test_tone_parsing():
+    """Test TONE mode result parsing"""
+    print("\n🧪 Testing TONE result parsing...")
+
+    processor = TextProcessor("test-key")
+    tone = processor._parse_tone_result(SAMPLE_TONE)
+    old_format = processor._parse_tone_result("СКРЫТЫЕ НАМЕРЕНИЯ: получить внимание\n💬 СТИЛЬ ВЗАИМОДЕЙСТВИЯ: эмпатично")
+
+    print(f"✅ TONE parsing test:")
+    print(f"  - New format: {tone}")
+    print(f"  - Old format: {old_format}")
+
+    return (
+        tone == {
+            'hidden_intent': 'уточнить условия',
+            'dominant_emotion': 'спокойствие',
+            'interaction_style': 'коротко по пунктам'
+        }
+        and old_format == {'hidden_intent': 'получить внимание', 'interaction_style': 'эмпатично'}
+        and processor._parse_tone_result(SAMPLE_TONE.replace("\n", "\r\n")) == tone
+        and processor._parse_tone_result("мусор") is None
+    )
+
+
+def test_format_output():
+    """Test formatted output for parsed result"""
+    print("\n🧪 Testing output formatting...")
+
+    processor = TextProcessor("test-key")
+    summary, bullets, actions, questions, risks = processor._parse_default_result(SAMPLE_DEFAULT)
+    result = ProcessingResult(
+        success=True, summary=summary, bullets=bullets, actions=actions,
+        questions=questions, risks=risks, processing_time=1.25
+    )
+    output = processor.format_output(result)
+
+    print(f"✅ Formatting test:")
+    print(output)
+
+    return (
+        output.startswith("📝 **Резюме**: Нужно созвониться")
+        and "• Бюджет и сроки" in output
+        and "⚡ **Действия**:\nСозвониться" in output
+        and output.endswith("⏱️ Обработано за 1.2с")
+        and processor.format_output(ProcessingResult(success=False)).startswith("❌")
+    )
+
+
+def main():
+    """Run all text processor tests"""
+    print("🔍 Testing text processor parsing...\n")
+
+    tests = [
+        ("DEFAULT Parsing", test_default_parsing),
+        ("DEFAULT JSON Parsing", test_default_json_parsing),
+        ("Streamed JSON Scanning", test_json_field_scanner),
+        ("TONE Parsing", test_tone_parsing),
+        ("Output Formatting", test_format_output)
+    ]
+
+    results = []
+
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"❌ {test_name} failed with error: {e}")
+            results.append((test_name, False))
+
+    # Summary
+    passed = sum(1 for _, success in results if success)
+    total = len(results)
+
+    print(f"\n📊 Test Results:")
+    for test_name, success in results:
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"  - {test_name}: {status}")
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    main()
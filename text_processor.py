@@ -9,22 +9,98 @@ import asyncio
 import json
 import os
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+import pickle
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
 
+import httpx
 import openai
-from openai import OpenAI
+try:
+    import h2  # noqa: F401  (installed by httpx[http2])
+    _HTTP2 = True
+except ImportError:  # plain httpx: fall back to pooled HTTP/1.1
+    _HTTP2 = False
+from openai import AsyncOpenAI
 
-from emotion_analyzer import EmotionAnalyzer, EmotionAnalysisIntegration
+import fast_json
+from emotion_analyzer import EMOTION_FIELDS, EmotionAnalyzer, EmotionAnalysisIntegration, EmotionScores
+from request_limiter import RequestLimiter
+from response_cache import ResponseCache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
+# One DEFAULT output line: a section header (old and new formats) or a bullet item.
+# Group name = section; the summary and item groups capture the line's text.
+# MULTILINE so finditer walks the whole output in one regex pass. Bullets are
+# most lines, so they are tried first (one '•' compare) before the headers.
+_DEFAULT_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:'
+    r'•[^\S\n]*(?P<item>.*)'
+    r'|(?:📝 )?РЕЗЮМЕ:(?P<summary>.*)'
+    r'|(?P<bullets>ОСНОВНЫЕ ПУНКТЫ)'
+    r'|(?P<actions>⚡ ДЕЙСТВИЯ|ДЕЙСТВИЯ:)'
+    r'|(?P<no_actions>нет явных действий)'
+    r'|(?P<questions>❓ ОТКРЫТЫЕ ВОПРОСЫ)'
+    r'|(?P<risks>⚠️ РИСКИ)'
+    r')',
+    re.MULTILINE
+)
+_NO_ACTIONS = 'нет явных действий'
 
-@dataclass
+# Model outputs longer than this are parsed in a worker thread so the bot's event
+# loop is not blocked; below it the thread hand-off costs more than the parse
+_OFFLOAD_PARSE_CHARS = 8000
+
+# Retry budget for calls a user is waiting on (DEFAULT/TONE/FUSED); the
+# limiter default of 5 attempts could keep a reply pending for over a minute
+_INTERACTIVE_ATTEMPTS = 3
+
+# Pickled parsed modes, stored next to the mode JSON files
+MODES_CACHE_FILE = ".cache.pkl"
+# Bump when the cache layout changes; Mode's field names are checked as well
+# (see _MODES_CACHE_FORMAT), so pickles from before a new Mode slot are discarded
+MODES_CACHE_VERSION = 2
+
+_REQUIRED_MODE_FIELDS = frozenset({'name', 'model', 'prompt', 'max_tokens', 'temperature', 'enabled'})
+
+# format_output templates
+_SUMMARY_FMT = "📝 **Резюме**: {}"
+_BULLETS_FMT = "**Основные пункты**:\n{}"
+_ACTIONS_LIST_FMT = "⚡ **Действия**:\n{}"
+_ACTIONS_LINE_FMT = "👉 **Действия**: {}"
+_NO_ACTIONS_LINE = f"⚡ **Действия**: {_NO_ACTIONS}"
+_QUESTIONS_FMT = "❓ **Открытые вопросы**:\n{}"
+_RISKS_FMT = "⚠️ **Риски/ограничения**:\n{}"
+_TIME_FMT = "\n⏱️ Обработано за {:.1f}с"
+
+# TONE mode field headers (old, new and bulleted formats) -> tone_data key
+_TONE_FIELD_HEADERS = {
+    'hidden_intent': ('🎯 СКРЫТОЕ НАМЕРЕНИЕ:', '🎯 СКРЫТЫЕ НАМЕРЕНИЯ:', 'СКРЫТОЕ НАМЕРЕНИЕ:', 'СКРЫТЫЕ НАМЕРЕНИЯ:'),
+    'dominant_emotion': ('😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', '😄 ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', 'ДОМИНИРУЮЩАЯ ЭМОЦИЯ:'),
+    'interaction_style': ('🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', '💬 СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', 'СТИЛЬ ВЗАИМОДЕЙСТВИЯ:')
+}
+_TONE_PREFIXES = {
+    bullet + header: key
+    for key, headers in _TONE_FIELD_HEADERS.items()
+    for header in headers
+    for bullet in ('', '• ')
+}
+# Line-anchored alternation of the exact prefixes (longest first); the matched header
+# is the lookup key. MULTILINE so finditer walks the whole output in one regex pass.
+_TONE_RE = re.compile(
+    r'^[^\S\n]*(?P<header>' + '|'.join(map(re.escape, sorted(_TONE_PREFIXES, key=len, reverse=True))) + r')(?P<value>.*)',
+    re.MULTILINE
+)
+
+
+@dataclass(slots=True, frozen=True)
 class Mode:
-    """Configuration for a processing mode"""
+    """Configuration for a processing mode (immutable once loaded)"""
     name: str
     model: str
     description: str
@@ -35,9 +111,33 @@ class Mode:
     enabled: bool
     created_at: str
     version: str
+    # "json_object" for modes whose prompt asks for structured JSON output
+    response_format: Optional[str] = None
+    # Stream the completion to on_partial callers (JSON modes report each
+    # completed top-level field, text modes each completed section)
+    enable_streaming: bool = True
+    # Static instructions sent as the system message; the transcript goes in the
+    # user message so the shared prefix stays cacheable by OpenAI prompt caching
+    system_prompt: str = ""
+    user_suffix: str = ""
+    system_message: Dict[str, str] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Split legacy '{text}' prompts once at load instead of formatting per request
+        # Frozen dataclass: derived fields are set via object.__setattr__
+        if not self.system_prompt:
+            system_part, _, user_suffix = self.prompt.partition('{text}')
+            object.__setattr__(self, 'system_prompt', system_part.rstrip())
+            object.__setattr__(self, 'user_suffix', user_suffix)
+        object.__setattr__(self, 'system_message', {"role": "system", "content": self.system_prompt})
+
+
+# Stored with the pickled modes; a Mode pickled before a field was added would
+# load without that slot and raise AttributeError on first use
+_MODES_CACHE_FORMAT = (MODES_CACHE_VERSION, tuple(f.name for f in fields(Mode)))
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessingResult:
     """Result of text processing through multiple modes"""
     success: bool
@@ -55,72 +155,270 @@ class ProcessingResult:
     emotion_processing_time: Optional[float] = None
 
 
+# ProcessingResult fields holding lists/dicts that callers may edit in place
+_MUTABLE_RESULT_FIELDS = ('bullets', 'questions', 'risks', 'tone_analysis',
+                          'emotion_scores', 'emotion_levels', 'emotion_high')
+
+
+def _copy_result(result: ProcessingResult, **changes: Any) -> ProcessingResult:
+    """Copy a result with its own list/dict fields, so cached and shared results stay unmodified"""
+    for name in _MUTABLE_RESULT_FIELDS:
+        if name not in changes:
+            value = getattr(result, name)
+            changes[name] = value.copy() if value is not None else None
+    return replace(result, **changes)
+
+
+class DefaultResultParser:
+    """
+    Incremental parser for DEFAULT mode output.
+    
+    Consumes _DEFAULT_LINE_RE matches, either for a whole output at once
+    or one line at a time from a streamed completion; a True return means
+    the previous section is complete and a partial result is worth showing.
+    """
+    
+    def __init__(self):
+        self.summary: Optional[str] = None
+        self.bullets: List[str] = []
+        # Action lines are joined once in result() instead of grown with +=
+        self.actions: List[str] = []
+        self.questions: List[str] = []
+        self.risks: List[str] = []
+        self.current_section: Optional[str] = None
+        # Section -> bound item handler, so a bullet costs one dict lookup on header change
+        self._handlers: Dict[str, Callable[[str], None]] = {
+            'bullets': self.bullets.append,
+            'actions': self.actions.append,
+            'questions': self.questions.append,
+            'risks': self.risks.append
+        }
+        self._add_item: Optional[Callable[[str], None]] = None
+    
+    def feed(self, line: str) -> bool:
+        """Consume one line; return True if it started a new section"""
+        match = _DEFAULT_LINE_RE.match(line)
+        return self.consume(match) if match else False
+    
+    def consume(self, match: re.Match) -> bool:
+        """Consume one header or bullet match; return True if it started a new section"""
+        section = match.lastgroup
+        if section == 'item':
+            if self._add_item is not None:
+                self._add_item(match.group('item').rstrip())
+            return False
+        
+        if section == 'summary':
+            self.summary = match.group('summary').strip()
+        elif section == 'no_actions':
+            # Special case for "no actions"
+            self.actions[:] = [_NO_ACTIONS]
+            section = 'actions'
+        self.current_section = section
+        self._add_item = self._handlers.get(section)
+        return True
+    
+    def result(self) -> Tuple[Optional[str], Optional[List[str]], Optional[str], Optional[List[str]], Optional[List[str]]]:
+        """Get summary, bullets, actions, questions and risks parsed so far"""
+        return (
+            self.summary,
+            self.bullets[:] if self.bullets else None,
+            '\n'.join(self.actions) if self.actions else None,
+            self.questions[:] if self.questions else None,
+            self.risks[:] if self.risks else None
+        )
+
+
+class JsonFieldScanner:
+    """
+    Incremental scanner for a streamed JSON object (structured-output modes).
+    
+    Tracks string and nesting state over the received text; feed() returns
+    the object made of the top-level fields completed so far each time
+    another field completes, otherwise None.
+    """
+    
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, delta: str) -> Optional[Dict[str, Any]]:
+        """Consume a chunk of the response; return completed fields if one more completed"""
+        self._text += delta
+        text = self._text
+        end = None
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    end = i
+            elif ch == ',' and self._depth == 1:
+                end = i
+        self._pos = len(text)
+        
+        if end is None:
+            return None
+        try:
+            data = fast_json.loads(text[:end] + '}')
+        except fast_json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
 class ModeManager:
     """Manages loading and validation of processing modes"""
     
     def __init__(self, modes_directory: str = "modes"):
         self.modes_directory = Path(modes_directory)
         self.modes: Dict[str, Mode] = {}
-        self._last_reload = None
+        self._last_reload: Optional[int] = None
+        self._enabled_cache: Optional[Tuple[Mode, ...]] = None
+        # Bumped whenever the mode set changes, so holders of cached Mode
+        # references (TextProcessor) know to look them up again
+        self.generation = 0
+        # Parsed modes keyed by file, reused on reload while the file mtime is unchanged;
+        # persisted to .cache.pkl so a cold start skips parsing too
+        self._file_cache: Dict[Path, Tuple[int, Mode]] = {}
+        self._cache_file = self.modes_directory / MODES_CACHE_FILE
         
     def load_modes(self) -> Dict[str, Mode]:
         """Load all modes from JSON files in modes directory"""
         try:
             self.modes = {}
+            self._modes_changed()
             
             if not self.modes_directory.exists():
-                logger.warning(f"Modes directory {self.modes_directory} does not exist")
+                logger.warning("Modes directory %s does not exist", self.modes_directory)
                 return self.modes
+            
+            if not self._file_cache:
+                self._file_cache = self._load_cache_file()
+            parsed_any = False
+            mode_files = list(self.modes_directory.glob("*.json"))
                 
-            for mode_file in self.modes_directory.glob("*.json"):
+            for mode_file in mode_files:
                 try:
-                    with open(mode_file, 'r', encoding='utf-8') as f:
-                        mode_data = json.load(f)
+                    mtime = mode_file.stat().st_mtime_ns
+                    cached = self._file_cache.get(mode_file)
+                    if cached and cached[0] == mtime:
+                        self.modes[cached[1].name] = cached[1]
+                        continue
+                    parsed_any = True
+                    
+                    mode_data = fast_json.loads(mode_file.read_bytes())
                     
                     # Validate mode configuration
                     if self._validate_mode_config(mode_data):
                         mode = Mode(**mode_data)
                         self.modes[mode.name] = mode
-                        logger.info(f"Loaded mode: {mode.name} (model: {mode.model})")
+                        self._file_cache[mode_file] = (mtime, mode)
+                        logger.info("Loaded mode: %s (model: %s)", mode.name, mode.model)
                     else:
-                        logger.error(f"Invalid mode configuration in {mode_file}")
+                        logger.error("Invalid mode configuration in %s", mode_file)
                         
                 except Exception as e:
-                    logger.error(f"Error loading mode from {mode_file}: {e}")
+                    logger.error("Error loading mode from %s: %s", mode_file, e)
+            
+            # Forget files that were deleted since the last load
+            removed = self._file_cache.keys() - set(mode_files)
+            for mode_file in removed:
+                del self._file_cache[mode_file]
+            
+            if parsed_any or removed:
+                self._save_cache_file()
                     
-            self._last_reload = datetime.now()
-            logger.info(f"Loaded {len(self.modes)} modes: {list(self.modes.keys())}")
+            self._last_reload = time.time_ns()
+            logger.info("Loaded %s modes: %s", len(self.modes), list(self.modes.keys()))
             return self.modes
             
         except Exception as e:
-            logger.error(f"Error loading modes: {e}")
+            logger.error("Error loading modes: %s", e)
             return {}
     
+    def _load_cache_file(self) -> Dict[Path, Tuple[int, Mode]]:
+        """Load parsed modes saved by a previous process, if any"""
+        try:
+            with open(self._cache_file, 'rb') as f:
+                cache_format, file_cache = pickle.load(f)
+            if cache_format != _MODES_CACHE_FORMAT:
+                logger.info("Discarding modes cache %s (stale format)", self._cache_file)
+                return {}
+            logger.info("Loaded %s cached modes from %s", len(file_cache), self._cache_file)
+            return file_cache
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Ignoring unreadable modes cache %s: %s", self._cache_file, e)
+            return {}
+    
+    def _save_cache_file(self):
+        """Persist parsed modes (per-file mtime + Mode) for the next cold start"""
+        temp_path = None
+        try:
+            # Write next to the cache and rename over it, so a concurrently
+            # starting process never reads a half-written pickle
+            fd, temp_path = tempfile.mkstemp(dir=self._cache_file.parent, prefix=self._cache_file.name, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((_MODES_CACHE_FORMAT, self._file_cache), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._cache_file)
+        except Exception as e:
+            logger.warning("Could not write modes cache %s: %s", self._cache_file, e)
+            if temp_path:
+                Path(temp_path).unlink(missing_ok=True)
+    
     def _validate_mode_config(self, mode_data: Dict[str, Any]) -> bool:
         """Validate mode configuration has required fields"""
-        required_fields = ['name', 'model', 'prompt', 'max_tokens', 'temperature', 'enabled']
-        
-        for field in required_fields:
-            if field not in mode_data:
-                logger.error(f"Missing required field '{field}' in mode configuration")
-                return False
+        missing = _REQUIRED_MODE_FIELDS - mode_data.keys()
+        if missing:
+            logger.error("Missing required fields %s in mode configuration", sorted(missing))
+            return False
                 
         return True
     
+    @property
+    def last_reload_iso(self) -> Optional[str]:
+        """UTC time of the last load_modes() call (stored as epoch ns)"""
+        if self._last_reload is None:
+            return None
+        return datetime.fromtimestamp(self._last_reload / 1e9, tz=timezone.utc).isoformat()
+    
+    def _modes_changed(self):
+        """Drop derived mode caches after self.modes was replaced or edited"""
+        self._enabled_cache = None
+        self.generation += 1
+    
     def get_mode(self, name: str) -> Optional[Mode]:
         """Get mode by name"""
         return self.modes.get(name)
     
-    def get_enabled_modes(self) -> List[Mode]:
-        """Get all enabled modes"""
-        return [mode for mode in self.modes.values() if mode.enabled]
+    def get_enabled_modes(self) -> Tuple[Mode, ...]:
+        """Get all enabled modes (rebuilt only after the modes change)"""
+        if self._enabled_cache is None:
+            self._enabled_cache = tuple(mode for mode in self.modes.values() if mode.enabled)
+        return self._enabled_cache
     
     def add_custom_mode(self, name: str, config: Dict[str, Any]) -> bool:
         """Add a custom mode and save to file"""
         try:
             # Add default values if missing
             config.setdefault('enabled', True)
-            config.setdefault('created_at', datetime.now().isoformat())
+            if 'created_at' not in config:
+                config['created_at'] = datetime.now(timezone.utc).isoformat()
             config.setdefault('version', '1.0')
             config.setdefault('max_tokens', 1000)
             config.setdefault('temperature', 0.5)
@@ -132,18 +430,22 @@ class ModeManager:
                 
             # Save to file
             mode_file = self.modes_directory / f"{name.lower()}.json"
-            with open(mode_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            with open(mode_file, 'wb') as f:
+                f.write(fast_json.dumps_pretty(config))
             
             # Add to loaded modes
             mode = Mode(**config)
             self.modes[name] = mode
+            self._modes_changed()
+            
+            # Persisted cache is stale now; it is rewritten on the next load_modes
+            self._cache_file.unlink(missing_ok=True)
             
-            logger.info(f"Added custom mode: {name}")
+            logger.info("Added custom mode: %s", name)
             return True
             
         except Exception as e:
-            logger.error(f"Error adding custom mode {name}: {e}")
+            logger.error("Error adding custom mode %s: %s", name, e)
             return False
 
 
@@ -151,22 +453,54 @@ class TextProcessor:
     """Processes transcribed text through multiple modes in parallel"""
     
     def __init__(self, openai_api_key: str, modes_directory: str = "modes"):
-        self.client = OpenAI(api_key=openai_api_key)
+        # One pooled HTTP/2 client (HTTP/1.1 if h2 is missing) shared by
+        # DEFAULT/TONE/emotion requests, so the fan-out reuses warm TLS
+        # connections instead of opening new ones.
+        # Messages arrive minutes apart, so idle connections are kept for 5 min
+        # (httpx default: 5 s) and the next message skips the TLS handshake
+        self._http = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=300),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        # Retries are done by request_limiter (outside the concurrency slot), not the SDK
+        self.client = AsyncOpenAI(api_key=openai_api_key, http_client=self._http, max_retries=0)
+        # Global cap on in-flight OpenAI requests (all users) with 429/timeout retries
+        self.request_limiter = RequestLimiter(int(os.getenv('OPENAI_MAX_CONCURRENCY', '8')))
         self.mode_manager = ModeManager(modes_directory)
         self.mode_manager.load_modes()
+        self._refresh_mode_refs()
+        
+        # Exact-match cache of mode responses, keyed by mode + prompt + text
+        self._response_cache = ResponseCache(maxsize=1024)
+        # Complete ProcessingResults keyed by modes + normalized text
+        self._result_cache = ResponseCache(maxsize=1024)
+        # Result futures of process_parallel calls still running, by result cache key
+        self._inflight: Dict[str, asyncio.Future] = {}
         
         # Initialize emotion analysis
-        self.emotion_analyzer = EmotionAnalyzer(self.client)
+        self.emotion_analyzer = EmotionAnalyzer(self.client, self.request_limiter)
         self.emotion_integration = EmotionAnalysisIntegration(self.emotion_analyzer)
         
-    async def process_parallel(self, text: str) -> ProcessingResult:
-        """Process text through DEFAULT and TONE modes in parallel"""
+    async def process_parallel(self, text: str,
+                               on_partial: Optional[Callable[[ProcessingResult], Awaitable[None]]] = None) -> ProcessingResult:
+        """
+        Process text through DEFAULT and TONE modes in parallel
+        
+        Args:
+            text: Text to process
+            on_partial: Optional callback; when set and DEFAULT has enable_streaming,
+                DEFAULT is streamed and the callback receives a partial result
+                each time a section completes
+        """
         try:
-            start_time = asyncio.get_event_loop().time()
+            start_time = time.perf_counter()
             
-            # Get required modes
-            default_mode = self.mode_manager.get_mode("DEFAULT")
-            tone_mode = self.mode_manager.get_mode("TONE")
+            # Required modes, cached until the mode manager reports a change
+            if self._modes_generation != self.mode_manager.generation:
+                self._refresh_mode_refs()
+            default_mode = self._default_mode
+            tone_mode = self._tone_mode
             
             if not default_mode or not tone_mode:
                 missing = []
@@ -179,153 +513,542 @@ class TextProcessor:
                 logger.error(error_msg)
                 return ProcessingResult(success=False, error_message=error_msg)
             
-            # Process both modes and emotion analysis in parallel
-            tasks = [
-                self._process_mode(text, default_mode),
-                self._process_mode(text, tone_mode),
-                self.emotion_analyzer.analyze_emotions(text)
-            ]
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Whole-result cache: a repeated transcript (forward, re-send) skips all three calls
+            result_key = make_cache_key(
+                default_mode.model, default_mode.prompt, tone_mode.model, tone_mode.prompt,
+                text.strip().lower()
+            )
+            cached = self._result_cache.get(result_key)
+            if cached is not None:
+                logger.info("Processing result served from cache")
+                return _copy_result(cached, processing_time=time.perf_counter() - start_time)
             
-            # Parse results
-            default_result = results[0] if not isinstance(results[0], Exception) else None
-            tone_result = results[1] if not isinstance(results[1], Exception) else None
-            emotion_result = results[2] if not isinstance(results[2], Exception) else None
+            # Same transcript already in flight (e.g. a forwarded voice note burst):
+            # wait for that request instead of paying for three more API calls
+            inflight = self._inflight.get(result_key)
+            if inflight is not None:
+                shared = await asyncio.shield(inflight)
+                if shared is not None:
+                    logger.info("Processing result shared with an in-flight request")
+                    return _copy_result(shared, processing_time=time.perf_counter() - start_time)
             
-            # Ensure results are strings or None
-            default_text = default_result if isinstance(default_result, str) else None
-            tone_text = tone_result if isinstance(tone_result, str) else None
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[result_key] = future
+            result = None
+            try:
+                result = await self._run_parallel(text, default_mode, tone_mode, on_partial, start_time, result_key)
+                return result
+            finally:
+                if self._inflight.get(result_key) is future:
+                    del self._inflight[result_key]
+                # Waiters redo the work themselves if this request failed or was cancelled
+                future.set_result(_copy_result(result) if result is not None and result.success else None)
             
-            # Parse DEFAULT mode result
+        except Exception as e:
+            logger.error("Error in parallel processing: %s", e)
+            return ProcessingResult(success=False, error_message=str(e))
+    
+    async def _run_parallel(self, text: str, default_mode: Mode, tone_mode: Mode,
+                            on_partial: Optional[Callable[[ProcessingResult], Awaitable[None]]],
+                            start_time: float, result_key: str) -> ProcessingResult:
+        """Run DEFAULT, TONE and emotion analysis for process_parallel and cache the result"""
+        # Process both modes and emotion analysis in parallel; each task
+        # handles its own errors and returns None on failure
+        default_text, tone_text, emotion_result = await asyncio.gather(
+            self._process_default_streaming(text, default_mode, on_partial)
+            if on_partial and default_mode.enable_streaming
+            else self._process_mode(text, default_mode),
+            self._process_mode(text, tone_mode),
+            self._safe_emotions(text)
+        )
+        
+        # Parse DEFAULT mode result (very long outputs off the event loop)
+        if default_text and len(default_text) > _OFFLOAD_PARSE_CHARS:
+            summary, bullets, actions, questions, risks = await asyncio.to_thread(self._parse_default_result, default_text)
+        else:
             summary, bullets, actions, questions, risks = self._parse_default_result(default_text)
-            
-            # Parse TONE mode result
+        
+        # Parse TONE mode result
+        if tone_text and len(tone_text) > _OFFLOAD_PARSE_CHARS:
+            tone_analysis = await asyncio.to_thread(self._parse_tone_result, tone_text)
+        else:
             tone_analysis = self._parse_tone_result(tone_text)
+        
+        # Process emotion analysis result
+        if emotion_result is not None:
+            emotion_scores, emotion_levels, emotion_high = self.emotion_analyzer.summarize(emotion_result)
+            emotion_processing_time = emotion_result.processing_time
+        else:
+            emotion_scores = emotion_levels = emotion_high = emotion_processing_time = None
+        
+        processing_time = time.perf_counter() - start_time
+        
+        result = ProcessingResult(
+            success=True,
+            summary=summary,
+            bullets=bullets,
+            actions=actions,
+            questions=questions,
+            risks=risks,
+            tone_analysis=tone_analysis,
+            emotion_scores=emotion_scores,
+            emotion_levels=emotion_levels,
+            emotion_high=emotion_high,
+            processing_time=processing_time,
+            emotion_processing_time=emotion_processing_time
+        )
+        
+        # Only cache complete results so a transient failure is retried next time
+        if default_text and tone_text and emotion_result is not None and not emotion_result.error_message:
+            self._result_cache.put(result_key, _copy_result(result))
+        
+        return result
+    
+    async def process_fused(self, text: str,
+                            on_partial: Optional[Callable[[ProcessingResult], Awaitable[None]]] = None) -> ProcessingResult:
+        """
+        Process text with a single structured-output call (FUSED mode).
+        
+        Summary, tone and emotion scores come back in one JSON object, so the
+        transcript is sent (and paid for) once instead of three times. Falls
+        back to process_parallel when FUSED is missing or disabled in
+        modes/fused.json, or when the fused call fails.
+        
+        Args:
+            text: Text to process
+            on_partial: Passed through to process_parallel on fallback
+        """
+        fused_mode = self.mode_manager.get_mode("FUSED")
+        if not fused_mode or not fused_mode.enabled:
+            return await self.process_parallel(text, on_partial)
+        
+        start_time = time.perf_counter()
+        content = await self._process_mode(text, fused_mode)
+        
+        try:
+            data = fast_json.loads(content) if content else None
+        except fast_json.JSONDecodeError as e:
+            logger.warning("FUSED result is not valid JSON: %s", e)
+            data = None
+        
+        if not isinstance(data, dict):
+            logger.warning("FUSED processing failed, falling back to parallel modes")
+            return await self.process_parallel(text, on_partial)
+        
+        result = self._result_from_json(data)
+        
+        emotions = data.get("emotions")
+        if isinstance(emotions, dict):
+            try:
+                scores = EmotionScores(**{
+                    name: min(1.0, max(0.0, float(emotions.get(name, 0.0))))
+                    for name in EMOTION_FIELDS
+                })
+                result.emotion_scores, result.emotion_levels, result.emotion_high = self.emotion_analyzer.summarize(scores)
+            except (TypeError, ValueError) as e:
+                logger.warning("Invalid FUSED emotion scores: %s", e)
+        
+        result.processing_time = time.perf_counter() - start_time
+        return result
+    
+    async def _safe_emotions(self, text: str) -> Optional[EmotionScores]:
+        """Run emotion analysis, returning None instead of raising"""
+        try:
+            return await self.emotion_analyzer.analyze_emotions(text)
+        except Exception as e:
+            logger.error("Error in emotion analysis: %s", e)
+            return None
+    
+    async def process_batch(self, texts: List[str], max_concurrency: int = 20) -> List[ProcessingResult]:
+        """
+        Process many transcripts concurrently (bulk/archival workloads).
+        
+        Args:
+            texts: Transcripts to process
+            max_concurrency: Maximum transcripts in flight at once (each one
+                fans out into DEFAULT + TONE + emotion requests)
+            
+        Returns:
+            ProcessingResult per text, in input order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def process_one(text: str) -> ProcessingResult:
+            async with semaphore:
+                return await self.process_parallel(text)
+        
+        return await asyncio.gather(*(process_one(text) for text in texts))
+    
+    async def process_parallel_batch(self, texts: List[str]) -> List[ProcessingResult]:
+        """
+        Process several transcripts in one structured-output call (BATCH mode).
+        
+        The static prompt is paid once for all texts and there is a single
+        round-trip. Emotion scores are not part of the batch output. Texts
+        missing from the response, or the whole batch on failure, fall back
+        to per-item process_parallel.
+        """
+        if not texts:
+            return []
+        
+        batch_mode = self.mode_manager.get_mode("BATCH")
+        if not batch_mode:
+            logger.warning("BATCH mode not found, processing texts individually")
+            return await self.process_batch(texts)
+        
+        start_time = time.perf_counter()
+        results: List[Optional[ProcessingResult]] = [None] * len(texts)
+        
+        try:
+            user_content = json.dumps([{"i": i, "t": t} for i, t in enumerate(texts)], ensure_ascii=False)
+            response = await self.request_limiter.call(
+                self.client.chat.completions.create,
+                model=batch_mode.model,
+                messages=[
+                    batch_mode.system_message,
+                    {"role": "user", "content": user_content}
+                ],
+                max_tokens=batch_mode.max_tokens,
+                temperature=batch_mode.temperature,
+                timeout=batch_mode.timeout,
+                response_format={"type": "json_object"}
+            )
+            
+            data = fast_json.loads(response.choices[0].message.content or "{}")
+            processing_time = time.perf_counter() - start_time
+            
+            for item in data.get("results", []):
+                index = item.get("i")
+                if isinstance(index, int) and 0 <= index < len(texts):
+                    results[index] = self._result_from_json(item, processing_time)
+                    
+        except Exception as e:
+            logger.error("Error in batch processing, falling back to per-item calls: %s", e)
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            logger.warning("Batch response missing %s of %s items, processing individually", len(missing), len(texts))
+            fallback = await self.process_batch([texts[i] for i in missing])
+            for i, result in zip(missing, fallback):
+                results[i] = result
+        
+        return results
+    
+    async def submit_batch(self, texts: List[str]) -> Optional[str]:
+        """
+        Submit transcripts to the OpenAI Batch API (offline, 50% token cost).
+        
+        Each text becomes one DEFAULT and one TONE request in a JSONL input
+        file. Results arrive within the 24h completion window; collect them
+        with poll_batch().
+        
+        Args:
+            texts: Transcripts to process
+            
+        Returns:
+            Batch ID, or None if there is nothing to submit
+        """
+        modes = [mode for mode in (self.mode_manager.get_mode("DEFAULT"), self.mode_manager.get_mode("TONE")) if mode and mode.enabled]
+        if not texts or not modes:
+            logger.warning("Nothing to submit for batch processing")
+            return None
+        
+        lines = []
+        for i, text in enumerate(texts):
+            for mode in modes:
+                body = {
+                    "model": mode.model,
+                    "messages": [
+                        mode.system_message,
+                        {"role": "user", "content": text + mode.user_suffix}
+                    ],
+                    "max_tokens": mode.max_tokens,
+                    "temperature": mode.temperature
+                }
+                if mode.response_format:
+                    body["response_format"] = {"type": mode.response_format}
+                lines.append(json.dumps({
+                    "custom_id": f"{mode.name}-{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body
+                }, ensure_ascii=False))
+        
+        payload = ("\n".join(lines) + "\n").encode('utf-8')
+        input_file = await self.client.files.create(file=("batch.jsonl", payload), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            # Failed requests only appear in the error file, so keep the text
+            # count to size the results in poll_batch()
+            metadata={"texts": str(len(texts))}
+        )
+        
+        logger.info("Submitted batch %s with %s requests for %s texts", batch.id, len(lines), len(texts))
+        return batch.id
+    
+    async def poll_batch(self, batch_id: str) -> Optional[List[ProcessingResult]]:
+        """
+        Check a batch submitted with submit_batch() and parse its results.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            
+        Returns:
+            ProcessingResult per submitted text (in input order) once the batch
+            has completed, None while it is still running, empty list if the
+            batch failed, expired or was cancelled. Texts whose requests all
+            failed get success=False.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.error("Batch %s finished with status %s", batch_id, batch.status)
+            return []
+        if batch.status != "completed":
+            return None
+        
+        outputs: Dict[str, Dict[int, str]] = {}
+        errors: Dict[int, str] = {}
+        count = int((batch.metadata or {}).get("texts", 0))
+        
+        # Successful requests are in the output file, failed ones in the error
+        # file; a batch where every request failed has no output file at all
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                item = fast_json.loads(line)
+                mode_name, _, index = item["custom_id"].rpartition("-")
+                index = int(index)
+                count = max(count, index + 1)
+                
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    error = item.get("error") or (response.get("body") or {}).get("error")
+                    logger.warning("Batch request %s failed: %s", item['custom_id'], error)
+                    errors.setdefault(index, str(error))
+                    continue
+                outputs.setdefault(mode_name, {})[index] = response["body"]["choices"][0]["message"]["content"]
+        
+        results = []
+        for i in range(count):
+            default_result = outputs.get("DEFAULT", {}).get(i)
+            tone_result = outputs.get("TONE", {}).get(i)
+            
+            if default_result is None and tone_result is None:
+                results.append(ProcessingResult(
+                    success=False,
+                    error_message=f"Batch request failed: {errors[i]}" if i in errors else "Batch request failed"
+                ))
+                continue
             
-            # Process emotion analysis result
-            emotion_scores = None
-            emotion_levels = None
-            emotion_high = None
-            emotion_processing_time = None
-            
-            if emotion_result and not isinstance(emotion_result, Exception):
-                from emotion_analyzer import EmotionScores
-                if isinstance(emotion_result, EmotionScores):
-                    emotion_scores = {
-                        'sarcasm': emotion_result.sarcasm,
-                        'toxicity': emotion_result.toxicity,
-                        'manipulation': emotion_result.manipulation
-                    }
-                    emotion_levels = self.emotion_analyzer.get_emotion_levels(emotion_result)
-                    emotion_high = self.emotion_analyzer.has_high_emotion(emotion_result)
-                    emotion_processing_time = emotion_result.processing_time
-            
-            processing_time = asyncio.get_event_loop().time() - start_time
-            
-            return ProcessingResult(
+            summary, bullets, actions, questions, risks = self._parse_default_result(default_result)
+            results.append(ProcessingResult(
                 success=True,
                 summary=summary,
                 bullets=bullets,
                 actions=actions,
                 questions=questions,
                 risks=risks,
-                tone_analysis=tone_analysis,
-                emotion_scores=emotion_scores,
-                emotion_levels=emotion_levels,
-                emotion_high=emotion_high,
-                processing_time=processing_time,
-                emotion_processing_time=emotion_processing_time
-            )
-            
-        except Exception as e:
-            logger.error(f"Error in parallel processing: {e}")
-            return ProcessingResult(success=False, error_message=str(e))
+                tone_analysis=self._parse_tone_result(tone_result)
+            ))
+        
+        logger.info("Batch %s completed: %s results", batch_id, len(results))
+        return results
+    
+    def _result_from_json(self, item: Dict[str, Any], processing_time: Optional[float] = None) -> ProcessingResult:
+        """Map one structured-output JSON object onto ProcessingResult"""
+        actions = item.get("actions")
+        if isinstance(actions, list):
+            actions = "\n".join(str(a) for a in actions if a) or None
+        
+        tone = item.get("tone")
+        tone_analysis = {k: v for k, v in tone.items() if v} if isinstance(tone, dict) else None
+        
+        return ProcessingResult(
+            success=True,
+            summary=item.get("summary") or None,
+            bullets=item.get("bullets") or None,
+            actions=actions or None,
+            questions=item.get("questions") or None,
+            risks=item.get("risks") or None,
+            tone_analysis=tone_analysis or None,
+            processing_time=processing_time
+        )
     
     async def _process_mode(self, text: str, mode: Mode) -> Optional[str]:
         """Process text through a single mode"""
         try:
-            # Format prompt with text
-            formatted_prompt = mode.prompt.format(text=text)
+            cache_key = make_cache_key(mode.name, mode.model, mode.prompt, text)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Mode %s served from cache", mode.name)
+                return cached
             
-            # Make API call
-            response = await asyncio.to_thread(
+            request = {}
+            if mode.response_format:
+                request["response_format"] = {"type": mode.response_format}
+            
+            # Stable instructions first, variable transcript last (prompt-cache friendly)
+            response = await self.request_limiter.call(
                 self.client.chat.completions.create,
                 model=mode.model,
                 messages=[
-                    {"role": "user", "content": formatted_prompt}
+                    mode.system_message,
+                    {"role": "user", "content": text + mode.user_suffix}
                 ],
                 max_tokens=mode.max_tokens,
                 temperature=mode.temperature,
-                timeout=mode.timeout
+                timeout=mode.timeout,
+                max_attempts=_INTERACTIVE_ATTEMPTS,
+                **request
             )
             
             content = response.choices[0].message.content
             if content:
                 result = content.strip()
-                logger.info(f"Mode {mode.name} processed successfully")
+                self._response_cache.put(cache_key, result)
+                logger.info("Mode %s processed successfully", mode.name)
                 return result
             else:
-                logger.warning(f"Mode {mode.name} returned empty content")
+                logger.warning("Mode %s returned empty content", mode.name)
                 return None
             
         except Exception as e:
-            logger.error(f"Error processing mode {mode.name}: {e}")
+            logger.error("Error processing mode %s: %s", mode.name, e)
             return None
     
+    async def _stream_mode(self, text: str, mode: Mode) -> AsyncIterator[str]:
+        """
+        Stream a single mode, yielding text chunks as they are generated.
+        
+        The full response is cached like in _process_mode; a cache hit is
+        replayed as a single chunk.
+        """
+        cache_key = make_cache_key(mode.name, mode.model, mode.prompt, text)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Mode %s served from cache", mode.name)
+            yield cached
+            return
+        
+        request = {}
+        if mode.response_format:
+            request["response_format"] = {"type": mode.response_format}
+        
+        parts = []
+        # The slot is held until the body is fully read, not just until create() returns
+        async with self.request_limiter.hold(
+            self.client.chat.completions.create,
+            model=mode.model,
+            messages=[
+                mode.system_message,
+                {"role": "user", "content": text + mode.user_suffix}
+            ],
+            max_tokens=mode.max_tokens,
+            temperature=mode.temperature,
+            timeout=mode.timeout,
+            max_attempts=_INTERACTIVE_ATTEMPTS,
+            stream=True,
+            **request
+        ) as stream:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        
+        result = "".join(parts).strip()
+        if result:
+            self._response_cache.put(cache_key, result)
+            logger.info("Mode %s streamed successfully", mode.name)
+        else:
+            logger.warning("Mode %s returned empty content", mode.name)
+    
+    async def _process_default_streaming(self, text: str, mode: Mode,
+                                         on_partial: Callable[[ProcessingResult], Awaitable[None]]) -> Optional[str]:
+        """
+        Stream DEFAULT mode, reporting a partial result as the output grows.
+        
+        JSON-format modes report each completed top-level field; text-format
+        modes report whenever a section completes.
+        """
+        parts = []
+        last_sent = None
+        
+        async def emit(parsed):
+            nonlocal last_sent
+            if parsed == last_sent or not any(parsed):
+                return
+            last_sent = parsed
+            summary, bullets, actions, questions, risks = parsed
+            try:
+                await on_partial(ProcessingResult(
+                    success=True, summary=summary, bullets=bullets, actions=actions,
+                    questions=questions, risks=risks
+                ))
+            except Exception as e:
+                logger.warning("Partial result callback failed: %s", e)
+        
+        try:
+            if mode.response_format:
+                scanner = JsonFieldScanner()
+                async for delta in self._stream_mode(text, mode):
+                    parts.append(delta)
+                    data = scanner.feed(delta)
+                    if data is not None:
+                        partial = self._result_from_json(data)
+                        await emit((partial.summary, partial.bullets, partial.actions, partial.questions, partial.risks))
+            else:
+                parser = DefaultResultParser()
+                buffer = ""
+                async for delta in self._stream_mode(text, mode):
+                    parts.append(delta)
+                    buffer += delta
+                    *lines, buffer = buffer.split('\n')
+                    for line in lines:
+                        if parser.feed(line):
+                            await emit(parser.result())
+                if buffer:
+                    parser.feed(buffer)
+        except Exception as e:
+            logger.error("Error streaming mode %s: %s", mode.name, e)
+            return None
+        
+        result = "".join(parts).strip()
+        return result or None
+    
     def _parse_default_result(self, result: Optional[str]) -> Tuple[Optional[str], Optional[List[str]], Optional[str], Optional[List[str]], Optional[List[str]]]:
         """Parse DEFAULT mode result into summary, bullets, actions, questions, and risks"""
         if not result:
             return None, None, None, None, None
             
+        # Structured-output modes return JSON; the line parser stays as fallback
+        # for text-format prompts and custom modes
+        if result[0] == '{':
+            try:
+                data = fast_json.loads(result)
+                parsed = self._result_from_json(data)
+                return parsed.summary, parsed.bullets, parsed.actions, parsed.questions, parsed.risks
+            except (fast_json.JSONDecodeError, AttributeError) as e:
+                logger.warning("DEFAULT result is not valid JSON, using text parser: %s", e)
+        
         try:
-            lines = result.split('\n')
-            summary = None
-            bullets = []
-            actions = None
-            questions = []
-            risks = []
-            
-            current_section = None
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Support both old and new formats
-                if line.startswith('📝 РЕЗЮМЕ:') or line.startswith('РЕЗЮМЕ:'):
-                    summary = line.replace('📝 РЕЗЮМЕ:', '').replace('РЕЗЮМЕ:', '').strip()
-                    current_section = 'summary'
-                elif line.startswith('ОСНОВНЫЕ ПУНКТЫ') or line.startswith('ОСНОВНЫЕ ПУНКТЫ:'):
-                    current_section = 'bullets'
-                elif line.startswith('⚡ ДЕЙСТВИЯ') or line.startswith('ДЕЙСТВИЯ:'):
-                    current_section = 'actions'
-                elif line.startswith('нет явных действий'):
-                    # Special case for "no actions"
-                    actions = 'нет явных действий'
-                    current_section = 'actions'
-                elif line.startswith('❓ ОТКРЫТЫЕ ВОПРОСЫ'):
-                    current_section = 'questions'
-                elif line.startswith('⚠️ РИСКИ'):
-                    current_section = 'risks'
-                elif line.startswith('•') and current_section == 'bullets':
-                    bullets.append(line.replace('•', '').strip())
-                elif line.startswith('•') and current_section == 'actions':
-                    # Collect action items
-                    if actions is None:
-                        actions = line.replace('•', '').strip()
-                    else:
-                        actions += '\n' + line.replace('•', '').strip()
-                elif line.startswith('•') and current_section == 'questions':
-                    questions.append(line.replace('•', '').strip())
-                elif line.startswith('•') and current_section == 'risks':
-                    risks.append(line.replace('•', '').strip())
-            
-            return summary, bullets if bullets else None, actions, questions if questions else None, risks if risks else None
+            parser = DefaultResultParser()
+            consume = parser.consume
+            for match in _DEFAULT_LINE_RE.finditer(result):
+                consume(match)
+            return parser.result()
             
         except Exception as e:
-            logger.error(f"Error parsing DEFAULT result: {e}")
+            logger.error("Error parsing DEFAULT result: %s", e)
             return None, None, None, None, None
     
     def _parse_tone_result(self, result: Optional[str]) -> Optional[Dict[str, str]]:
@@ -334,44 +1057,16 @@ class TextProcessor:
             return None
             
         try:
-            lines = result.split('\n')
-            tone_data = {}
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Support both old and new formats for backward compatibility
-                if line.startswith('🎯 СКРЫТОЕ НАМЕРЕНИЕ:') or line.startswith('🎯 СКРЫТЫЕ НАМЕРЕНИЯ:') or line.startswith('СКРЫТЫЕ НАМЕРЕНИЯ:'):
-                    intent_text = line.replace('🎯 СКРЫТОЕ НАМЕРЕНИЕ:', '').replace('🎯 СКРЫТЫЕ НАМЕРЕНИЯ:', '').replace('СКРЫТЫЕ НАМЕРЕНИЯ:', '').strip()
-                    tone_data['hidden_intent'] = intent_text
-                elif line.startswith('😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ:') or line.startswith('😄 ДОМИНИРУЮЩАЯ ЭМОЦИЯ:') or line.startswith('ДОМИНИРУЮЩАЯ ЭМОЦИЯ:'):
-                    emotion_text = line.replace('😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', '').replace('😄 ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', '').replace('ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', '').strip()
-                    tone_data['dominant_emotion'] = emotion_text
-                elif line.startswith('🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ:') or line.startswith('💬 СТИЛЬ ВЗАИМОДЕЙСТВИЯ:') or line.startswith('СТИЛЬ ВЗАИМОДЕЙСТВИЯ:'):
-                    style_text = line.replace('🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', '').replace('💬 СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', '').replace('СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', '').strip()
-                    tone_data['interaction_style'] = style_text
-                elif line.startswith('🔎 ПРИЗНАКИ (цитаты):'):
-                    # Skip quotes section for now, keep in interaction_style if needed
-                    current_section = 'quotes'
-                elif line.startswith('🎛 УВЕРЕННОСТЬ:'):
-                    # Skip confidence section for now
-                    current_section = 'confidence'
-                elif line.startswith('• 🎯 СКРЫТОЕ НАМЕРЕНИЕ:'):
-                    intent_text = line.replace('• 🎯 СКРЫТОЕ НАМЕРЕНИЕ:', '').strip()
-                    tone_data['hidden_intent'] = intent_text
-                elif line.startswith('• 😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ:'):
-                    emotion_text = line.replace('• 😶‍🌫️ ДОМИНИРУЮЩАЯ ЭМОЦИЯ:', '').strip()
-                    tone_data['dominant_emotion'] = emotion_text
-                elif line.startswith('• 🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ:'):
-                    style_text = line.replace('• 🗣️ СТИЛЬ ВЗАИМОДЕЙСТВИЯ:', '').strip()
-                    tone_data['interaction_style'] = style_text
+            # Quotes and confidence sections are not matched and are skipped for now
+            tone_data = {
+                _TONE_PREFIXES[match.group('header')]: match.group('value').strip()
+                for match in _TONE_RE.finditer(result)
+            }
             
             return tone_data if tone_data else None
             
         except Exception as e:
-            logger.error(f"Error parsing TONE result: {e}")
+            logger.error("Error parsing TONE result: %s", e)
             return None
     
     def format_output(self, result: ProcessingResult) -> str:
@@ -383,35 +1078,33 @@ class TextProcessor:
         
         # Summary
         if result.summary:
-            output_parts.append(f"📝 **Резюме**: {result.summary}")
+            output_parts.append(_SUMMARY_FMT.format(result.summary))
         
         # Bullets
         if result.bullets:
-            bullets_text = "\n".join([f"• {bullet}" for bullet in result.bullets])
-            output_parts.append(f"**Основные пункты**:\n{bullets_text}")
+            output_parts.append(_BULLETS_FMT.format("\n".join(f"• {bullet}" for bullet in result.bullets)))
         
         # Actions - support new format with multiple lines
-        if result.actions and result.actions.strip():
+        actions = result.actions.strip() if result.actions else None
+        if actions:
             # Check for "no actions" case
-            if result.actions.strip() == 'нет явных действий':
-                output_parts.append(f"⚡ **Действия**: нет явных действий")
+            if actions == _NO_ACTIONS:
+                output_parts.append(_NO_ACTIONS_LINE)
             # Check if actions contain multiple lines (new format)
             elif '\n' in result.actions:
                 # New format with structured actions
-                output_parts.append(f"⚡ **Действия**:\n{result.actions}")
+                output_parts.append(_ACTIONS_LIST_FMT.format(result.actions))
             else:
                 # Old format - single line
-                output_parts.append(f"👉 **Действия**: {result.actions}")
+                output_parts.append(_ACTIONS_LINE_FMT.format(result.actions))
         
         # Questions
         if result.questions:
-            questions_text = "\n".join([f"• {q}" for q in result.questions])
-            output_parts.append(f"❓ **Открытые вопросы**:\n{questions_text}")
+            output_parts.append(_QUESTIONS_FMT.format("\n".join(f"• {q}" for q in result.questions)))
         
         # Risks
         if result.risks:
-            risks_text = "\n".join([f"• {risk}" for risk in result.risks])
-            output_parts.append(f"⚠️ **Риски/ограничения**:\n{risks_text}")
+            output_parts.append(_RISKS_FMT.format("\n".join(f"• {risk}" for risk in result.risks)))
         
         # Emotion analysis indicators - REMOVED from main output (available via /layers command)
         # if result.emotion_levels:
@@ -437,10 +1130,20 @@ class TextProcessor:
         
         # Processing time
         if result.processing_time:
-            output_parts.append(f"\n⏱️ Обработано за {result.processing_time:.1f}с")
+            output_parts.append(_TIME_FMT.format(result.processing_time))
         
         return "\n\n".join(output_parts) if output_parts else "❌ Нет результатов обработки"
     
+    async def aclose(self):
+        """Close pooled HTTP connections (call on application shutdown)"""
+        await self._http.aclose()
+    
+    def _refresh_mode_refs(self):
+        """Cache the DEFAULT and TONE modes used on every process_parallel call"""
+        self._default_mode = self.mode_manager.get_mode("DEFAULT")
+        self._tone_mode = self.mode_manager.get_mode("TONE")
+        self._modes_generation = self.mode_manager.generation
+    
     def reload_modes(self):
         """Reload modes from files (hot-reload capability)"""
         self.mode_manager.load_modes()
@@ -0,0 +1,147 @@
+"""
+Transcript Storage for Telegram Voice-to-Insight Bot
+
+Stores transcript records on disk as msgpack and renders the human-readable
+text file only when the user actually downloads it (/transcript).
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constant parts of the rendered .txt file, encoded once per process
+_HEADER_BYTES = "ТРАНСКРИПТ СООБЩЕНИЯ\n".encode('utf-8')
+_FOOTER_BYTES = "\n\n---\nСоздано ботом TLDR Buddy".encode('utf-8')
+
+_DURABLE_FLAGS = (os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+                  | getattr(os, 'O_DSYNC', 0) | getattr(os, 'O_BINARY', 0))
+
+
+def make_record(user_id: str, text: str, msg_type: str = "voice", created: Optional[float] = None) -> Dict[str, Any]:
+    """Build a transcript record in the on-disk layout"""
+    return {
+        "created": created if created is not None else time.time(),
+        "user": user_id,
+        "type": msg_type,
+        "text": text
+    }
+
+
+def save(path: Path, record: Dict[str, Any]) -> int:
+    """
+    Serialize transcript record to msgpack and write it to disk.
+
+    Args:
+        path: Target file path
+        record: Transcript record (see make_record)
+
+    Returns:
+        Number of bytes written
+    """
+    payload = pack(record)
+    durable_write(path, payload)
+    return len(payload)
+
+
+def durable_write(path: Path, data: bytes) -> None:
+    """
+    Write data so it is on stable storage when the call returns.
+
+    Opens with O_DSYNC so the write itself is synchronous, avoiding a
+    separate fsync. Platforms without O_DSYNC (Windows) fall back to a
+    plain write.
+    """
+    fd = os.open(path, _DURABLE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def pack(record: Dict[str, Any]) -> bytes:
+    """Serialize transcript record to msgpack bytes"""
+    # Imported on use: the bot itself only renders transcripts, so msgpack is
+    # not a startup dependency
+    import msgpack
+    return msgpack.packb(record, use_bin_type=True)
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """Read transcript record previously written by save()"""
+    import msgpack
+    return msgpack.unpackb(path.read_bytes(), raw=False)
+
+
+def render(record: Dict[str, Any]) -> str:
+    """Render transcript record as the human-readable .txt file content"""
+    return render_bytes(record).decode('utf-8')
+
+
+def render_bytes(record: Dict[str, Any]) -> bytes:
+    """Render transcript record as UTF-8 .txt file bytes"""
+    created = datetime.fromtimestamp(record["created"]).strftime('%Y-%m-%d %H:%M:%S')
+    meta = f"""Дата: {created}
+Пользователь: {record["user"]}
+Тип сообщения: {record["type"]}
+
+""".encode('utf-8')
+
+    return b"".join((_HEADER_BYTES, meta, record["text"].encode('utf-8'), _FOOTER_BYTES))
+
+
+class AsyncArtifactWriter:
+    """
+    Background writer for non-critical artifacts (transcript files, advice history).
+
+    Writes are queued and flushed by a daemon thread so disk I/O stays off
+    the user-response path. Use flush_sync() when the file must exist before
+    continuing (tests, shutdown), and close() to stop the thread.
+    """
+
+    def __init__(self):
+        # None is the stop sentinel put by close()
+        self._q: "queue.Queue[Optional[Tuple[Path, bytes]]]" = queue.Queue()
+        self._failed: List[Tuple[Path, Exception]] = []
+        self._t = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._t.start()
+
+    def write(self, path: Path, data: bytes) -> None:
+        """Queue data to be written to path"""
+        self._q.put((path, data))
+
+    def flush_sync(self) -> None:
+        """Block until every queued write has been flushed; raise if any failed"""
+        self._q.join()
+        if self._failed:
+            failed, self._failed = self._failed, []
+            path, error = failed[0]
+            raise OSError(f"Failed to write {len(failed)} artifact(s), first {path}: {error}")
+
+    def close(self) -> None:
+        """Flush queued writes and stop the writer thread"""
+        self._q.put(None)
+        self._t.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                self._q.task_done()
+                return
+            path, data = item
+            try:
+                durable_write(path, data)
+            except Exception as e:
+                logger.error(f"Failed to write artifact {path}: {e}")
+                self._failed.append((path, e))
+            finally:
+                self._q.task_done()